@@ -0,0 +1,71 @@
+import json
+import os
+
+import pygame
+
+from pykanoid.utils import (
+    ATLAS_IMAGE_PATH,
+    ATLAS_INDEX_PATH,
+    BASE_IMAGE_PATH,
+    get_relative_path,
+    scaled_image_name,
+)
+
+ATLAS_WIDTH = 1024
+# images that are only ever shown at a smaller size get pre-scaled copies
+SCALED_VARIANTS = {
+    "life/heart_48.png": [(24, 24)],
+}
+
+__PADDING = 1
+
+
+def pack():
+    images = __collect_images()
+
+    # shelf packing: place the tallest images first, row by row
+    index = {}
+    x, y, row_height = 0, 0, 0
+    for name, image in sorted(
+        images.items(), key=lambda item: item[1].get_height(), reverse=True
+    ):
+        if x + image.get_width() > ATLAS_WIDTH:
+            x, y, row_height = 0, y + row_height + __PADDING, 0
+        index[name] = [x, y, image.get_width(), image.get_height()]
+        x += image.get_width() + __PADDING
+        row_height = max(row_height, image.get_height())
+
+    atlas = pygame.Surface((ATLAS_WIDTH, y + row_height), pygame.SRCALPHA)
+    for name, rect in index.items():
+        atlas.blit(images[name], rect)
+
+    os.makedirs(os.path.dirname(get_relative_path(ATLAS_IMAGE_PATH)), exist_ok=True)
+    pygame.image.save(atlas, get_relative_path(ATLAS_IMAGE_PATH))
+    with open(get_relative_path(ATLAS_INDEX_PATH), "w") as index_file:
+        json.dump(index, index_file, indent=1, sort_keys=True)
+
+    return index
+
+
+def __collect_images():
+    images = {}
+    base_path = get_relative_path(BASE_IMAGE_PATH)
+    for dir_path, _, file_names in os.walk(base_path):
+        for file_name in file_names:
+            if not file_name.endswith(".png"):
+                continue
+
+            name = os.path.relpath(os.path.join(dir_path, file_name), base_path)
+            name = name.replace(os.sep, "/")
+            images[name] = pygame.image.load(os.path.join(dir_path, file_name))
+
+            for size in SCALED_VARIANTS.get(name, []):
+                images[scaled_image_name(name, size)] = pygame.transform.scale(
+                    images[name], size
+                )
+    return images
+
+
+if __name__ == "__main__":
+    packed = pack()
+    print(f"Packed {len(packed)} images into {ATLAS_IMAGE_PATH}")
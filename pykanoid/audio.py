@@ -0,0 +1,149 @@
+import os
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pygame
+
+from pykanoid.settings import VOLUME
+from pykanoid.utils import get_relative_path
+
+AUDIO_DIR = "data/audio"
+BACKGROUND_DIR = "background"
+# compressed tracks are preferred when a track ships in several formats
+MUSIC_EXTENSIONS = (".ogg", ".mp3", ".wav")
+MAX_VOICES = 4
+
+
+class MusicManager:
+    __FADE_TIME = 0.5
+    # two channels kept away from the sound effects, so the outgoing track
+    # keeps playing while the next one fades in
+    __CHANNELS = 2
+
+    def __init__(self, tracks, audio_dir=AUDIO_DIR, volume=VOLUME):
+        self.__volume = volume
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+        self.__sounds: dict[tuple[str, float], Future] = {}
+        self.__pending = None
+
+        pygame.mixer.set_reserved(self.__CHANNELS)
+        self.__channels = [pygame.mixer.Channel(i) for i in range(self.__CHANNELS)]
+        self.__current = 0
+
+        audio_dir = get_relative_path(audio_dir)
+        self.__paths = self.__find_tracks(audio_dir, tracks)
+        self.__background_tracks = []
+        background_dir = os.path.join(audio_dir, BACKGROUND_DIR)
+        if os.path.isdir(background_dir):
+            for name, path in self.__find_tracks(background_dir).items():
+                self.__paths[f"{BACKGROUND_DIR}/{name}"] = path
+                self.__background_tracks.append(f"{BACKGROUND_DIR}/{name}")
+
+        # decode every track in the background so switching music never waits
+        # on the disk or the decoder
+        for name, path in self.__paths.items():
+            self.__sounds[(name, 0.0)] = self.__executor.submit(self.__decode, path)
+
+    def play(self, name, loops=0, start=0.0, endevent=pygame.NOEVENT):
+        if name not in self.__paths:
+            return
+
+        # the music being replaced must not post its end event
+        self.__channels[self.__current].set_endevent()
+
+        key = (name, float(start))
+        if key not in self.__sounds:
+            self.__sounds[key] = self.__executor.submit(
+                self.__trim, self.__sounds[(name, 0.0)], start
+            )
+        self.__pending = (self.__sounds[key], loops, endevent)
+
+    def play_background(self, endevent=pygame.NOEVENT):
+        if self.__background_tracks:
+            self.play(random.choice(self.__background_tracks), endevent=endevent)
+
+    def update(self, dt):
+        # the track starts on the first frame after it is decoded
+        if self.__pending is None or not self.__pending[0].done():
+            return
+
+        sound, loops, endevent = self.__pending
+        self.__pending = None
+        fade_ms = int(self.__FADE_TIME * 1000)
+
+        self.__channels[self.__current].fadeout(fade_ms)
+        self.__current = (self.__current + 1) % self.__CHANNELS
+        channel = self.__channels[self.__current]
+        channel.set_volume(self.__volume)
+        channel.play(sound.result(), loops, fade_ms=fade_ms)
+        channel.set_endevent(endevent)
+
+    @staticmethod
+    def __find_tracks(directory, names=None) -> dict[str, str]:
+        tracks = {}
+        file_names = sorted(os.listdir(directory))
+        for extension in MUSIC_EXTENSIONS:
+            for file_name in file_names:
+                name, file_extension = os.path.splitext(file_name)
+                if file_extension == extension and (not names or name in names):
+                    tracks.setdefault(name, os.path.join(directory, file_name))
+        return tracks
+
+    @staticmethod
+    def __decode(path) -> pygame.mixer.Sound:
+        return pygame.mixer.Sound(path)
+
+    @staticmethod
+    def __trim(sound: Future, start) -> pygame.mixer.Sound:
+        # channels can't seek, so a track played from an offset is a copy
+        # starting there
+        frequency, size, channels = pygame.mixer.get_init()
+        frame_size = abs(size) // 8 * channels
+        raw = sound.result().get_raw()
+        return pygame.mixer.Sound(buffer=raw[round(start * frequency) * frame_size :])
+
+
+class SoundBank:
+    def __init__(
+        self, enabled=True, audio_dir=AUDIO_DIR, volume=VOLUME, max_voices=MAX_VOICES
+    ):
+        self.enabled = enabled
+        self.__audio_dir = audio_dir
+        self.__volume = volume
+        self.__max_voices = max_voices
+        self.__sounds: dict[str, pygame.mixer.Sound] = {}
+        self.__voices: dict[str, list[pygame.mixer.Channel]] = {}
+        self.__triggered: set[str] = set()
+
+    def load(self, name):
+        if not self.enabled or name in self.__sounds:
+            return
+
+        sound = pygame.mixer.Sound(get_relative_path(f"{self.__audio_dir}/{name}.wav"))
+        sound.set_volume(self.__volume)
+        self.__sounds[name] = sound
+        self.__voices[name] = []
+
+    def play(self, name):
+        if self.enabled:
+            self.__triggered.add(name)
+
+    def flush(self):
+        # every sound triggered during the frame plays at most once
+        for name in self.__triggered:
+            sound = self.__sounds[name]
+            voices = [
+                channel
+                for channel in self.__voices[name]
+                if channel.get_busy() and channel.get_sound() == sound
+            ]
+
+            if len(voices) < self.__max_voices:
+                # unlike find_channel, this leaves the music channels alone
+                channel = sound.play()
+                if channel:
+                    voices.append(channel)
+
+            self.__voices[name] = voices
+
+        self.__triggered.clear()
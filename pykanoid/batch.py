@@ -0,0 +1,276 @@
+import argparse
+import csv
+import importlib
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+from pykanoid.entities import Ball
+from pykanoid.settings import TILE_DENSITY, TOTAL_LIVES
+from pykanoid.simulation import Simulation
+from pykanoid.status import State
+from pykanoid.tile import _SCORES
+
+OUTPUT_PATH = "batch.csv"
+CONTROLLER = "pykanoid.batch:follow_ball"
+MAX_TIME = 600
+FOLLOW_DEAD_ZONE = 8
+
+BALL_PARAMETERS = {
+    "initial_acceleration_ratio": "INITIAL_ACCELERATION_RATIO",
+    "max_acceleration_ratio": "MAX_ACCELERATION_RATIO",
+    "hit_threshold_ratio": "HIT_THRESHOLD_RATIO",
+}
+# a tile takes one hit per color down to green whatever the strength table says,
+# so only the scores can be swept
+TILE_TABLES = {"score": _SCORES}
+PARAMETERS = (
+    "density",
+    *BALL_PARAMETERS,
+    *(f"{name}.{color}" for name, table in TILE_TABLES.items() for color in table),
+)
+STATS = (
+    "won",
+    "score",
+    "lives_lost",
+    "paddle_hits",
+    "remaining_tiles",
+    "steps",
+    "duration",
+    "wall_time",
+)
+
+__ball_defaults = {
+    attribute: getattr(Ball, attribute) for attribute in BALL_PARAMETERS.values()
+}
+__table_defaults = {name: dict(table) for name, table in TILE_TABLES.items()}
+__controllers = {}
+
+
+def follow_ball(simulation):
+    # keep the paddle centered under the ball
+    offset = simulation.ball.rect().centerx - simulation.paddle.rect().centerx
+    if abs(offset) < FOLLOW_DEAD_ZONE:
+        return 0
+    return 1 if offset > 0 else -1
+
+
+def load_controller(spec):
+    module_name, _, function_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def run_game(
+    seed, parameters, controller=CONTROLLER, max_time=MAX_TIME, dt=Simulation.DT
+):
+    if controller not in __controllers:
+        __controllers[controller] = load_controller(controller)
+
+    __apply(parameters)
+    try:
+        simulation = Simulation(
+            dt=dt, seed=seed, density=parameters.get("density", TILE_DENSITY)
+        )
+        start = time.perf_counter()
+        status = simulation.play(
+            __controllers[controller], max_steps=round(max_time / simulation.dt)
+        )
+    finally:
+        # leave the game as it was for whoever runs next in this process
+        __apply({})
+
+    return {
+        "seed": seed,
+        **parameters,
+        "won": status.state == State.GAME_WON,
+        "score": status.score,
+        "lives_lost": TOTAL_LIVES - status.lives,
+        "paddle_hits": simulation.ball.total_paddle_hits,
+        "remaining_tiles": simulation.tilemap.remaining_tiles,
+        "steps": simulation.steps,
+        "duration": simulation.steps * simulation.dt,
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+def sweep(grid: dict[str, list], games, seed=0):
+    names = list(grid)
+    for values in itertools.product(*grid.values()):
+        parameters = dict(zip(names, values))
+        for game in range(games):
+            yield seed + game, parameters
+
+
+class CsvSink:
+    def __init__(self, path, field_names):
+        self.__file = open(path, "w", newline="")
+        self.__writer = csv.DictWriter(self.__file, fieldnames=field_names)
+        self.__writer.writeheader()
+
+    def write(self, row):
+        self.__writer.writerow(row)
+
+    def close(self):
+        self.__file.close()
+
+
+class ParquetSink:
+    __BATCH_SIZE = 1024
+
+    def __init__(self, path, field_names):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.__pyarrow = pyarrow
+        self.__path = path
+        self.__field_names = field_names
+        self.__writer: pyarrow.parquet.ParquetWriter | None = None
+        self.__rows = []
+
+    def write(self, row):
+        self.__rows.append(row)
+        if len(self.__rows) >= self.__BATCH_SIZE:
+            self.__flush()
+
+    def close(self):
+        self.__flush()
+        if self.__writer:
+            self.__writer.close()
+
+    def __flush(self):
+        if not self.__rows:
+            return
+
+        table = self.__pyarrow.Table.from_pylist(
+            [{name: row[name] for name in self.__field_names} for row in self.__rows]
+        )
+        if self.__writer is None:
+            self.__writer = self.__pyarrow.parquet.ParquetWriter(
+                self.__path, table.schema
+            )
+        else:
+            table = table.cast(self.__writer.schema)
+        self.__writer.write_table(table)
+        self.__rows = []
+
+
+def run_batch(
+    tasks,
+    sink,
+    controller=CONTROLLER,
+    max_time=MAX_TIME,
+    dt=Simulation.DT,
+    processes=None,
+):
+    tasks = [(seed, parameters, controller, max_time, dt) for seed, parameters in tasks]
+    processes = processes or os.cpu_count()
+    # big enough chunks to amortize the inter-process overhead, small enough
+    # to keep every worker busy until the end
+    chunk_size = max(1, len(tasks) // (processes * 4))
+
+    with multiprocessing.Pool(processes) as pool:
+        for row in pool.imap_unordered(__run_task, tasks, chunk_size):
+            sink.write(row)
+
+    return len(tasks)
+
+
+def __run_task(task):
+    return run_game(*task)
+
+
+def __apply(parameters):
+    # anything not overridden goes back to default
+    for name, attribute in BALL_PARAMETERS.items():
+        setattr(Ball, attribute, parameters.get(name, __ball_defaults[attribute]))
+    for name, table in TILE_TABLES.items():
+        for color, value in __table_defaults[name].items():
+            table[color] = parameters.get(f"{name}.{color}", value)
+
+
+def __parse_parameter(parser, argument):
+    name, _, values = argument.partition("=")
+    if name not in PARAMETERS or not values:
+        parser.error(
+            f"invalid parameter {argument!r}, expected NAME=VALUE[,VALUE...] "
+            f"with NAME in {', '.join(PARAMETERS)}"
+        )
+
+    value_type = int if "." in name else float
+    try:
+        return name, [value_type(value) for value in values.split(",")]
+    except ValueError:
+        parser.error(f"invalid value for {name}: {values}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="pykanoid.batch")
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE[,VALUE...]",
+        help="parameter values to sweep, every combination is played",
+    )
+    parser.add_argument(
+        "--games", type=int, default=1, help="seeded games per parameter combination"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument(
+        "--controller",
+        default=CONTROLLER,
+        help="paddle controller as module:function, called with the simulation",
+    )
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        default=MAX_TIME,
+        help="simulated seconds after which a game is stopped",
+    )
+    parser.add_argument(
+        "--dt", type=float, default=Simulation.DT, help="simulation time step"
+    )
+    parser.add_argument("--processes", type=int, help="worker processes")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=OUTPUT_PATH,
+        help="where to write the stats, as CSV or .parquet",
+    )
+    args = parser.parse_args()
+
+    grid = dict(__parse_parameter(parser, argument) for argument in args.param)
+    try:
+        load_controller(args.controller)
+    except (ImportError, AttributeError, ValueError):
+        parser.error(f"can't load controller {args.controller}")
+
+    field_names = ["seed", *grid, *STATS]
+    if args.output.endswith(".parquet"):
+        try:
+            sink = ParquetSink(args.output, field_names)
+        except ImportError:
+            parser.error("writing parquet requires pyarrow")
+    else:
+        sink = CsvSink(args.output, field_names)
+
+    start = time.perf_counter()
+    try:
+        games = run_batch(
+            sweep(grid, args.games, args.seed),
+            sink,
+            args.controller,
+            args.max_time,
+            args.dt,
+            args.processes,
+        )
+    finally:
+        sink.close()
+
+    print(f"{games} games in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
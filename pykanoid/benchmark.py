@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pygame
+
+from pykanoid.game import Game
+from pykanoid.header import Header
+from pykanoid.simulation import Simulation
+from pykanoid.status import Status, State
+from pykanoid.tilemap import Tilemap
+
+BASELINE_PATH = "benchmarks/baseline.json"
+REGRESSION_THRESHOLD = 0.1
+TILE_DENSITIES = (0.25, 0.5, 0.75, 1.0)
+
+__REPEAT = 5
+__MIN_DURATION = 0.2
+
+
+def ball_update(density):
+    simulation = Simulation(seed=0, density=density)
+
+    def prepare():
+        if simulation.status.state != State.PLAYING:
+            __restart(simulation)
+
+    return prepare, simulation.step
+
+
+def generate_random():
+    simulation = Simulation(seed=0)
+    return simulation.tilemap.generate_random
+
+
+def tile_collision():
+    simulation = Simulation(seed=0)
+    simulation.tilemap.generate_random()
+    ball_rect = simulation.ball.rect()
+    rects = [
+        ball_rect.move(x, y)
+        for x in range(0, simulation.GAME_AREA_SIZE[0], ball_rect.width)
+        for y in range(0, simulation.GAME_AREA_SIZE[1], ball_rect.height)
+    ]
+
+    def run():
+        for rect in rects:
+            simulation.tilemap.tile_collision(rect)
+
+    return run
+
+
+def rects():
+    simulation = Simulation(seed=0)
+    simulation.tilemap.generate_random()
+    return simulation.tilemap.rects
+
+
+def trigger_hit():
+    simulation = Simulation(seed=0)
+    tiles = []
+
+    def prepare():
+        if not tiles or simulation.status.state != State.PLAYING:
+            __restart(simulation)
+            tiles[:] = [
+                location
+                for location, tile in simulation.tilemap.tilemap.items()
+                if tile.strength > 0
+            ]
+
+    def run():
+        simulation.tilemap.trigger_hit(tiles.pop())
+
+    return prepare, run
+
+
+def tilemap_render():
+    game = __display_game()
+    tilemap = Tilemap(game)
+    tilemap.generate_random()
+    surface = pygame.Surface(game.GAME_AREA_SIZE)
+    return lambda: tilemap.render(surface)
+
+
+def header_render():
+    game = __display_game()
+    header = Header(game.status)
+    surface = pygame.Surface(game.HEADER_AREA_SIZE)
+    return lambda: header.render(surface)
+
+
+BENCHMARKS = {
+    **{
+        f"ball_update[{density}]": lambda density=density: ball_update(density)
+        for density in TILE_DENSITIES
+    },
+    "generate_random": generate_random,
+    "tile_collision": tile_collision,
+    "rects": rects,
+    "trigger_hit": trigger_hit,
+    "tilemap_render": tilemap_render,
+    "header_render": header_render,
+}
+
+
+def run_benchmarks(name_filter=""):
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if name_filter in name:
+            benchmark = setup()
+            if callable(benchmark):
+                results[name] = __measure(benchmark)
+            else:
+                results[name] = __measure(benchmark[1], benchmark[0])
+            print(f"{name:24} {results[name] * 1e6:12.2f}us")
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for name, seconds in results.items():
+        if name in baseline and seconds > baseline[name] * (1 + threshold):
+            regressions.append(name)
+            print(
+                f"{name} regressed: "
+                f"{baseline[name] * 1e6:.2f}us -> {seconds * 1e6:.2f}us"
+            )
+    return regressions
+
+
+def __measure(function, prepare=None):
+    # grow the number of calls until a run is long enough to time reliably
+    number = 1
+    while True:
+        duration = __time(function, prepare, number)
+        if duration >= __MIN_DURATION:
+            break
+        number *= 2
+
+    best = duration
+    for _ in range(__REPEAT - 1):
+        best = min(best, __time(function, prepare, number))
+
+    return best / number
+
+
+def __time(function, prepare, number):
+    if prepare is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        return time.perf_counter() - start
+
+    # only the calls are timed, getting the simulation ready for them is not
+    duration = 0
+    for _ in range(number):
+        prepare()
+        start = time.perf_counter()
+        function()
+        duration += time.perf_counter() - start
+    return duration
+
+
+def __restart(simulation):
+    simulation.reset()
+    simulation.start()
+    simulation.step()
+    simulation.launch()
+
+
+def __display_game():
+    if not pygame.display.get_init():
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.init()
+        pygame.display.set_mode((1, 1))
+
+    return SimpleNamespace(
+        headless=False,
+        GAME_AREA_SIZE=Game.GAME_AREA_SIZE,
+        HEADER_AREA_SIZE=Game.HEADER_AREA_SIZE,
+        status=Status(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="pykanoid.benchmark")
+    parser.add_argument("--filter", default="", help="only run matching benchmarks")
+    parser.add_argument("--save", help="save the results as a new baseline")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=BASELINE_PATH,
+        help="fail if any benchmark is slower than the baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="tolerated slowdown ratio before a benchmark counts as a regression",
+    )
+    args = parser.parse_args()
+
+    # check the baseline first rather than after all the benchmarks ran
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare) as baseline_file:
+                baseline = json.load(baseline_file)
+        except FileNotFoundError:
+            parser.error(
+                f"no baseline at {args.compare}, "
+                "record one with `make benchmark_baseline`"
+            )
+        except ValueError:
+            parser.error(f"invalid baseline at {args.compare}")
+
+    results = run_benchmarks(args.filter)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=1, sort_keys=True)
+
+    if baseline is not None:
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
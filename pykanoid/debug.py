@@ -1,15 +1,24 @@
 import pygame
 
 from pykanoid.settings import WINDOW_HEIGHT
+from pykanoid.text import TextCache
 
-pygame.init()
+__text: TextCache | None = None
 
-__font = pygame.font.Font(None, 30)
 
-
-def debug(info, y=WINDOW_HEIGHT - 30, x=10):
-    display_surface = pygame.display.get_surface()
-    debug_surface = __font.render(str(info), True, "White")
+def debug(info, y=WINDOW_HEIGHT - 30, x=10, surface=None):
+    # pass game.screen with the GPU renderer, it has no display surface
+    display_surface = surface or pygame.display.get_surface()
+    debug_surface = __get_text().render(str(info), True, "White")
     debug_rect = debug_surface.get_rect(topleft=(x, y))
-    pygame.draw.rect(display_surface, "Black", debug_rect)
+    display_surface.fill("Black", debug_rect)
     display_surface.blit(debug_surface, debug_rect)
+
+
+def __get_text():
+    global __text
+    # importing the module must not initialize pygame, only using it does
+    if __text is None:
+        pygame.font.init()
+        __text = TextCache(pygame.font.Font(None, 30))
+    return __text
@@ -1,46 +1,67 @@
+import math
+
 import pygame
 from pygame import Rect, Surface
 
-from pykanoid.settings import VOLUME
 from pykanoid.status import State
-from pykanoid.tile import Tile
-from pykanoid.utils import RANDOM_GENERATOR, get_relative_path
+from pykanoid.utils import lazy_import, RANDOM_GENERATOR
+
+np = lazy_import("numpy")
 
 
 class PhysicsEntity:
+    __slots__ = (
+        "game",
+        "type",
+        "position",
+        "velocity",
+        "acceleration",
+        "__asset",
+        "__mask",
+        "__rect",
+    )
+
     def __init__(self, game, e_type, position, asset: Surface):
         self.game = game
         self.type = e_type
         self.position = list(position)
+        # a single rect per entity, moved along with it instead of rebuilt
+        self.__rect = pygame.Rect(self.position, asset.get_size())
         self.asset = asset
         self.velocity = [0, 0]
         self.acceleration = 0
 
+    @property
+    def asset(self) -> Surface:
+        return self.__asset
+
+    @asset.setter
+    def asset(self, asset: Surface):
+        self.__asset = asset
+        self.__mask = None
+        self.__rect.size = asset.get_size()
+
     def rect(self) -> pygame.Rect:
-        return pygame.Rect(
-            self.position[0],
-            self.position[1],
-            self.asset.get_width(),
-            self.asset.get_height(),
-        )
+        self.__rect.x = self.position[0]
+        self.__rect.y = self.position[1]
+        return self.__rect
 
     def mask(self) -> pygame.Mask:
-        return pygame.mask.from_surface(self.asset)
+        if self.__mask is None:
+            self.__mask = pygame.mask.from_surface(self.__asset)
+        return self.__mask
 
     def update(self, dt, movement=(0, 0)):
-        frame_movement = (
-            (movement[0] + self.velocity[0]) * self.acceleration,
-            (movement[1] + self.velocity[1]) * self.acceleration,
-        )
-
-        self.position[0] += frame_movement[0] * dt
-        self.position[1] += frame_movement[1] * dt
+        self.position[0] += (movement[0] + self.velocity[0]) * self.acceleration * dt
+        self.position[1] += (movement[1] + self.velocity[1]) * self.acceleration * dt
 
     def render(self, surface):
         surface.blit(self.asset, self.position)
 
 
 class Paddle(PhysicsEntity):
+    __slots__ = ()
+
     def __init__(self, game, e_type, position, asset: Surface):
         super().__init__(game, e_type, position, asset)
 
@@ -56,31 +77,35 @@ class Paddle(PhysicsEntity):
 
 
 class Ball(PhysicsEntity):
-    __INITIAL_ACCELERATION_RATIO = 0.4
-    __MAX_ACCELERATION_RATIO = 0.7
-    __HIT_THRESHOLD_RATIO = 0.03
+    INITIAL_ACCELERATION_RATIO = 0.4
+    MAX_ACCELERATION_RATIO = 0.7
+    HIT_THRESHOLD_RATIO = 0.03
     __COLLISION_THRESHOLD = 5
 
+    __slots__ = (
+        "__initial_acceleration",
+        "__max_acceleration",
+        "active",
+        "paddle_hits",
+        "total_paddle_hits",
+    )
+
     def __init__(self, game, e_type, position, asset: Surface):
         super().__init__(game, e_type, position, asset)
 
         self.__initial_acceleration = (
-            self.game.paddle.acceleration * self.__INITIAL_ACCELERATION_RATIO
+            self.game.paddle.acceleration * self.INITIAL_ACCELERATION_RATIO
         )
         self.__max_acceleration = (
-            self.game.paddle.acceleration * self.__MAX_ACCELERATION_RATIO
+            self.game.paddle.acceleration * self.MAX_ACCELERATION_RATIO
         )
 
         self.active = False
         self.velocity = [RANDOM_GENERATOR.choice((-1, 1)), -1]
         self.paddle_hits = 0
+        self.total_paddle_hits = 0
         self.acceleration = self.__initial_acceleration
 
-        self.collision_sound = pygame.mixer.Sound(
-            get_relative_path("data/audio/collision.wav")
-        )
-        self.collision_sound.set_volume(VOLUME)
-
     def launch(self):
         self.active = True
 
@@ -101,16 +126,29 @@ class Ball(PhysicsEntity):
         paddle_rect: pygame.Rect = self.game.paddle.rect()
 
         entity_rect.midbottom = paddle_rect.midtop
-        self.position = pygame.math.Vector2(entity_rect.topleft)
+        self.position[0] = entity_rect.x
+        self.position[1] = entity_rect.y
 
     def __move(self, dt):
-        if self.paddle_hits >= self.acceleration * self.__HIT_THRESHOLD_RATIO:
+        if self.paddle_hits >= self.acceleration * self.HIT_THRESHOLD_RATIO:
             self.acceleration *= 1.15
             self.paddle_hits = 0
 
         if self.acceleration >= self.__max_acceleration:
             self.acceleration = self.__max_acceleration
 
+        # split the movement so the ball never travels further than the
+        # collision threshold in a single step and can't tunnel through
+        distance = (
+            max(abs(self.velocity[0]), abs(self.velocity[1])) * self.acceleration * dt
+        )
+        sub_steps = max(1, math.ceil(distance / self.__COLLISION_THRESHOLD))
+        for _ in range(sub_steps):
+            self.__step(dt / sub_steps)
+            if self.game.status.state != State.PLAYING:
+                break
+
+    def __step(self, dt):
         self.position[0] += self.velocity[0] * self.acceleration * dt
         self.position[1] += self.velocity[1] * self.acceleration * dt
 
@@ -142,6 +180,9 @@ class Ball(PhysicsEntity):
             self.velocity[0] *= -1
 
     def __check_paddle_collision(self, entity_rect, paddle_rect):
+        if not entity_rect.colliderect(paddle_rect):
+            return
+
         entity_mask: pygame.Mask = self.mask()
         paddle_mask: pygame.Mask = self.game.paddle.mask()
 
@@ -154,7 +195,7 @@ class Ball(PhysicsEntity):
         )
 
         if overlap:
-            self.collision_sound.play()
+            self.game.sounds.play("collision")
             # check if collision was from above
             if (
                 abs(entity_rect.bottom - paddle_rect.top) < self.__COLLISION_THRESHOLD
@@ -164,6 +205,7 @@ class Ball(PhysicsEntity):
                 self.position[1] = entity_rect.y
                 self.velocity[1] *= -1
                 self.paddle_hits += 1
+                self.total_paddle_hits += 1
             # check if collision was from bellow
             if (
                 abs(entity_rect.top - paddle_rect.bottom) < self.__COLLISION_THRESHOLD
@@ -192,14 +234,13 @@ class Ball(PhysicsEntity):
                 self.velocity[0] *= -1
 
     def __check_tiles_collision(self, entity_rect):
-        tiles: list[Tile] = self.game.tilemap.tile_list()
-        tile_recs: list[Rect] = self.game.tilemap.rects()
-        collision_tile_index = entity_rect.collidelist(tile_recs)
-        if collision_tile_index > 0:
-            self.collision_sound.play()
-            self.game.tilemap.trigger_hit(tiles[collision_tile_index])
+        collision = self.game.tilemap.tile_collision(entity_rect)
+        if collision:
+            tile_rec: Rect
+            location, tile_rec = collision
 
-            tile_rec: Rect = tile_recs[collision_tile_index]
+            self.game.sounds.play("collision")
+            self.game.tilemap.trigger_hit(location)
 
             # check if collision was from above
             if (
@@ -233,3 +274,189 @@ class Ball(PhysicsEntity):
                 entity_rect.left = tile_rec.right
                 self.position[0] = entity_rect.x
                 self.velocity[0] *= -1
+
+
+class BallGroup:
+    __COLLISION_THRESHOLD = 5
+    # launch angles from the horizontal, steep enough to reach the tiles but
+    # never straight up
+    __LAUNCH_ANGLES = (30, 60)
+    # the main ball moves diagonally with unit components
+    __SPEED = math.sqrt(2)
+
+    def __init__(self, game, e_type, asset: Surface):
+        self.game = game
+        self.type = e_type
+        self.asset = asset
+        # the arrays are only created by the first spawn, so numpy is not
+        # imported unless extra balls are used
+        self.positions = self.velocities = self.accelerations = ()
+        self.__size = asset.get_size()
+        self.__collision_rect = pygame.Rect((0, 0), self.__size)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def spawn(self, position, count, acceleration):
+        if not count:
+            return
+
+        velocities = []
+        for _ in range(count):
+            angle = math.radians(RANDOM_GENERATOR.uniform(*self.__LAUNCH_ANGLES))
+            velocities.append(
+                (
+                    RANDOM_GENERATOR.choice((-1, 1)) * math.cos(angle) * self.__SPEED,
+                    -math.sin(angle) * self.__SPEED,
+                )
+            )
+        self.positions = np.concatenate(
+            (
+                np.reshape(self.positions, (-1, 2)),
+                np.tile(np.asarray(position, dtype=float), (count, 1)),
+            )
+        )
+        self.velocities = np.concatenate(
+            (np.reshape(self.velocities, (-1, 2)), np.reshape(velocities, (-1, 2)))
+        )
+        self.accelerations = np.concatenate(
+            (self.accelerations, np.full(count, acceleration, dtype=float))
+        )
+
+    def clear(self):
+        if len(self):
+            self.__keep(np.zeros(len(self), dtype=bool))
+
+    def rect(self) -> pygame.Rect:
+        if not len(self):
+            return pygame.Rect(0, 0, 0, 0)
+
+        top_left = self.positions.min(axis=0)
+        bottom_right = self.positions.max(axis=0) + self.__size
+        return pygame.Rect(top_left.tolist(), (bottom_right - top_left).tolist())
+
+    def update(self, dt, movement=(0, 0)):
+        if not len(self):
+            return
+
+        # same bound as Ball: no ball moves further than the collision threshold
+        distance = np.abs(self.velocities).max() * self.accelerations.max() * dt
+        sub_steps = max(1, math.ceil(distance / self.__COLLISION_THRESHOLD))
+        for _ in range(sub_steps):
+            # a ball may have ended the round, later hits would be invalid
+            if self.game.status.state != State.PLAYING:
+                break
+            self.__step(dt / sub_steps)
+
+    def render(self, surface):
+        if not len(self):
+            return
+
+        surface.blits(
+            [(self.asset, position) for position in self.positions.tolist()],
+            doreturn=False,
+        )
+
+    def __step(self, dt):
+        self.positions += self.velocities * self.accelerations[:, np.newaxis] * dt
+
+        self.__check_game_area_collision()
+        self.__check_paddle_collision()
+        self.__check_tiles_collision()
+
+    def __check_game_area_collision(self):
+        width, height = self.game.GAME_AREA_SIZE
+
+        # balls falling off the bottom are lost, they don't cost a life
+        self.__keep(self.positions[:, 1] + self.__size[1] < height)
+        x, y = self.positions[:, 0], self.positions[:, 1]
+        velocity_x, velocity_y = self.velocities[:, 0], self.velocities[:, 1]
+
+        top = (y <= 0) & (velocity_y < 0)
+        y[top] = 0
+        velocity_y[top] *= -1
+
+        left = (x <= 0) & (velocity_x < 0)
+        x[left] = 0
+        velocity_x[left] *= -1
+
+        right = (x + self.__size[0] >= width) & (velocity_x > 0)
+        x[right] = width - self.__size[0]
+        velocity_x[right] *= -1
+
+    def __check_paddle_collision(self):
+        paddle_rect = self.game.paddle.rect()
+        x, y = self.positions[:, 0], self.positions[:, 1]
+
+        hit = (
+            (x + self.__size[0] > paddle_rect.left)
+            & (x < paddle_rect.right)
+            & (y + self.__size[1] > paddle_rect.top)
+            & (y < paddle_rect.bottom)
+            & (self.velocities[:, 1] > 0)
+        )
+        y[hit] = paddle_rect.top - self.__size[1]
+        self.velocities[hit, 1] *= -1
+        if hit.any():
+            self.game.sounds.play("collision")
+
+    def __check_tiles_collision(self):
+        tilemap = self.game.tilemap
+        tile_width, tile_height = tilemap.tile_size
+        grid_width, grid_height = tilemap.grid_size
+
+        # only balls inside the tile rows can hit anything
+        candidates = np.flatnonzero(self.positions[:, 1] < grid_height * tile_height)
+        if not len(candidates):
+            return
+
+        # the grid cells under the corners of every candidate, looked up at once,
+        # only the balls over an occupied cell are checked one by one
+        x, y = self.positions[candidates, 0], self.positions[candidates, 1]
+        columns = [
+            np.clip(edge // tile_width, 0, grid_width - 1).astype(int)
+            for edge in (x, x + self.__size[0] - 1)
+        ]
+        rows = [
+            np.clip(edge // tile_height, 0, grid_height - 1).astype(int)
+            for edge in (y, y + self.__size[1] - 1)
+        ]
+        occupied = np.zeros(len(candidates), dtype=bool)
+        for column in columns:
+            for row in rows:
+                occupied |= tilemap.tilemap.occupied(column, row)
+
+        for index in candidates[occupied].tolist():
+            self.__collision_rect.topleft = self.positions[index].tolist()
+            collision = tilemap.tile_collision(self.__collision_rect)
+            if not collision:
+                continue
+
+            location, tile_rect = collision
+            self.game.sounds.play("collision")
+            tilemap.trigger_hit(location)
+            self.__bounce(index, self.__collision_rect, tile_rect)
+
+    def __bounce(self, index, entity_rect: Rect, obstacle_rect: Rect):
+        overlap = entity_rect.clip(obstacle_rect)
+        position = self.positions[index]
+        velocity = self.velocities[index]
+
+        # bounce off the side the ball went the least into
+        if overlap.width < overlap.height:
+            if velocity[0] > 0:
+                position[0] = obstacle_rect.left - self.__size[0]
+            else:
+                position[0] = obstacle_rect.right
+            velocity[0] *= -1
+        else:
+            if velocity[1] > 0:
+                position[1] = obstacle_rect.top - self.__size[1]
+            else:
+                position[1] = obstacle_rect.bottom
+            velocity[1] *= -1
+
+    def __keep(self, kept):
+        self.positions = self.positions[kept]
+        self.velocities = self.velocities[kept]
+        self.accelerations = self.accelerations[kept]
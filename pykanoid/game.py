@@ -1,45 +1,202 @@
-import fnmatch
+import argparse
 import os
 import sys
 import time
 
 import pygame
 
-from pykanoid.entities import Ball, Paddle
+from pykanoid.audio import MusicManager, SoundBank
+from pykanoid.entities import Ball, BallGroup, Paddle
 from pykanoid.header import Header
-from pykanoid.settings import *
+from pykanoid.input import Action, InputHandler
+from pykanoid.levels import LevelLoader
+from pykanoid.profiler import FrameProfiler, StartupTimer
+from pykanoid.renderer import (
+    Display,
+    DirtyRectRenderer,
+    FullFrameRenderer,
+    GpuRenderer,
+    ScaledDisplay,
+    SCALING_MODES,
+)
+from pykanoid.replay import Recorder, Replay
+from pykanoid.settings import (
+    ARRAY_TILEMAP,
+    BACKGROUND_COLOR,
+    DIRTY_RECTS,
+    EXTRA_BALLS,
+    FONT_FILE_PATH,
+    FPS,
+    IDLE_FPS,
+    MAX_FRAME_TIME,
+    PHYSICS_HZ,
+    PROFILE,
+    PROFILE_ALLOCATIONS,
+    PROFILE_TRACE_PATH,
+    RENDERER,
+    REQUIRE_ACCELERATION,
+    SCALING,
+    SCALING_WINDOW_SIZE,
+    STARTUP_REPORT,
+    VSYNC,
+    WINDOW_HEIGHT,
+    WINDOW_WIDTH,
+)
 from pykanoid.status import Status, State
 from pykanoid.tilemap import Tilemap
-from pykanoid.utils import load_image, RANDOM_GENERATOR, get_relative_path
+from pykanoid.utils import (
+    load_image,
+    get_relative_path,
+    seed_random,
+)
 
 EVENT_PLAY_THEME_MUSIC = pygame.constants.USEREVENT + 1
 EVENT_PLAY_NEXT_BACKGROUND_MUSIC = pygame.constants.USEREVENT + 2
 
 
 class Game:
-    __PADDLE_OFFSET_Y = 100
+    PADDLE_OFFSET_Y = 100
+
+    headless = False
 
     HEADER_AREA_SIZE = (WINDOW_WIDTH, 40)
     GAME_AREA_SIZE = (WINDOW_WIDTH, WINDOW_HEIGHT - HEADER_AREA_SIZE[1])
 
-    def __init__(self):
-        pygame.init()
+    __LOW_POWER_STATES = (State.IDLE, State.GAME_LOST, State.GAME_WON)
+    __PADDLE_STATES = (State.IDLE, State.WAITING_BALL_RELEASE, State.PLAYING)
+
+    def __init__(
+        self,
+        fps=FPS,
+        vsync=VSYNC,
+        dirty_rects=DIRTY_RECTS,
+        profile=PROFILE,
+        profile_trace_path=PROFILE_TRACE_PATH,
+        profile_allocations=PROFILE_ALLOCATIONS,
+        seed=None,
+        record_path=None,
+        replay_path=None,
+        extra_balls=EXTRA_BALLS,
+        array_tilemap=ARRAY_TILEMAP,
+        startup_report=STARTUP_REPORT,
+        renderer=RENDERER,
+        require_acceleration=REQUIRE_ACCELERATION,
+        scaling=SCALING,
+        window_size=SCALING_WINDOW_SIZE,
+    ):
+        self.__startup = StartupTimer(startup_report)
+
+        # only the modules needed for the first frame, audio is set up after it
+        pygame.display.init()
+        pygame.font.init()
         pygame.display.set_caption("Pykanoid")
 
-        self.__font = pygame.font.Font(get_relative_path(FONT_FILE_PATH), 36)
+        self.profiler = FrameProfiler(
+            profile, profile_trace_path, allocations=profile_allocations
+        )
 
-        self.status = Status()
-        self.movement = [False, False]
+        self.__replay = Replay(replay_path) if replay_path else None
+        if self.__replay:
+            seed = self.__replay.seed
+            extra_balls = self.__replay.extra_balls
+            array_tilemap = self.__replay.array_tilemap
+        seed = seed_random(seed)
+        self.__recorder = (
+            Recorder(record_path, seed, extra_balls, array_tilemap)
+            if record_path
+            else None
+        )
 
-        self.__init_surfaces()
+        self.__extra_balls = extra_balls
+        self.__array_tilemap = array_tilemap
+        self.__fps = fps
+        self.__vsync = vsync
+        self.__clock = pygame.time.Clock()
 
-        self.__init_sounds()
+        self.__font = pygame.font.Font(get_relative_path(FONT_FILE_PATH), 36)
+
+        self.status = Status()
 
-    def __init_surfaces(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.__event_handlers = {
+            pygame.QUIT: self.__quit,
+            EVENT_PLAY_THEME_MUSIC: self.__play_music_theme,
+            EVENT_PLAY_NEXT_BACKGROUND_MUSIC: self.__play_next_background_music,
+            pygame.WINDOWSIZECHANGED: self.__resize,
+        }
+        self.__action_handlers = {
+            Action.START: self.__start,
+            Action.LAUNCH: self.__launch,
+            Action.RESTART: self.__restart,
+            Action.QUIT: self.__quit,
+        }
+        self.input = InputHandler(event_types=self.__event_handlers)
+
+        self.__init_display(
+            renderer, dirty_rects, require_acceleration, scaling, window_size
+        )
+        self.__show_loading_frame()
+        self.__startup.mark("window")
 
         self.__init_header_surface()
         self.__init_game_surface()
+        self.__startup.mark("game")
+
+        self.__init_sounds()
+        self.__startup.mark("audio")
+
+    def __init_display(
+        self, renderer, dirty_rects, require_acceleration, scaling, window_size
+    ):
+        if renderer == "gpu":
+            try:
+                self.__renderer = GpuRenderer(
+                    self,
+                    (WINDOW_WIDTH, WINDOW_HEIGHT),
+                    self.__vsync,
+                    require_acceleration,
+                    scaling,
+                    window_size,
+                )
+                self.display = self.__renderer.display
+                self.screen = self.display.surface
+                return
+            except pygame.error as error:
+                print(f"falling back to software rendering: {error}", file=sys.stderr)
+
+        if scaling != "off":
+            pygame.display.set_mode(
+                window_size or (WINDOW_WIDTH, WINDOW_HEIGHT), pygame.RESIZABLE
+            )
+            self.display = ScaledDisplay((WINDOW_WIDTH, WINDOW_HEIGHT), scaling)
+        elif self.__vsync:
+            # vsync is only honoured by SDL for scaled or OpenGL windows
+            self.display = Display(
+                pygame.display.set_mode(
+                    (WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SCALED, vsync=1
+                )
+            )
+        else:
+            self.display = Display(
+                pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+            )
+        self.screen = self.display.surface
+
+        if dirty_rects:
+            self.__renderer = DirtyRectRenderer(self)
+        else:
+            self.__renderer = FullFrameRenderer(self)
+
+    def __show_loading_frame(self):
+        # get a window on screen before the assets and the audio are loaded
+        loading_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        loading_surface.fill(BACKGROUND_COLOR)
+        text_surface = self.__font.render("Loading...", False, "White")
+        loading_surface.blit(
+            text_surface,
+            text_surface.get_rect(center=loading_surface.get_rect().center),
+        )
+        self.__renderer.show(loading_surface)
+        pygame.event.pump()
 
     def __init_header_surface(self):
         self.header_surface = pygame.Surface(self.HEADER_AREA_SIZE)
@@ -50,7 +207,8 @@ class Game:
         self.start_instructions_surface = self.__font.render(
             "Press ENTER to start", False, "White"
         )
-        self.tilemap = Tilemap(self)
+        self.tilemap = Tilemap(self, self.__array_tilemap)
+        self.levels = LevelLoader()
         self.__init_paddle()
         self.__init_ball()
 
@@ -61,13 +219,13 @@ class Game:
             "paddle",
             (
                 self.GAME_AREA_SIZE[0] / 2 - asset_paddle.get_width() / 2,
-                self.GAME_AREA_SIZE[1] - self.__PADDLE_OFFSET_Y,
+                self.GAME_AREA_SIZE[1] - self.PADDLE_OFFSET_Y,
             ),
             asset_paddle,
         )
 
     def __init_ball(self):
-        asset_ball = load_image("ballGrey.png")
+        asset_ball = load_image("ballBlue.png")
         self.ball = Ball(
             self,
             "ball",
@@ -77,163 +235,329 @@ class Game:
             ),
             asset_ball,
         )
+        self.balls = BallGroup(self, "ball", asset_ball)
 
     def __init_sounds(self):
-        pygame.mixer.pre_init(44100, -16, 2, 512)
-        pygame.mixer.init()
+        pygame.mixer.init(44100, -16, 2, 512)
         pygame.mixer.set_num_channels(64)
 
-        self.sound_life_lost = pygame.mixer.Sound(
-            get_relative_path("data/audio/life_lost.wav")
-        )
-        self.sound_life_lost.set_volume(VOLUME)
+        self.sounds = SoundBank()
+        self.sounds.load("collision")
+        self.sounds.load("life_lost")
 
-        Game.__play_music_theme()
+        self.music = MusicManager(("theme", "game_start", "game_over", "game_won"))
+        self.__play_music_theme()
 
     def run(self):
-        previous_time = time.time()
+        try:
+            self.__loop()
+        finally:
+            # keep the recording even if the game crashed
+            if self.__recorder:
+                self.__recorder.close()
+
+    def __loop(self):
+        physics_dt = 1 / PHYSICS_HZ
+        accumulator = 0
+        previous_time = time.perf_counter()
         while True:
-            dt = time.time() - previous_time
-            previous_time = time.time()
-
-            self.game_surface.fill(BACKGROUND_COLOR)
-            self.header_surface.fill(BACKGROUND_COLOR)
-
-            self.__handle_events()
-
-            self.paddle.update(dt, (self.movement[1] - self.movement[0], 0))
-
-            self.__handle_state(dt)
-
-            self.header.update(self.status)
-
-            self.__render_surfaces()
-
-            pygame.display.update()
-
-    def __handle_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                Game.__quit()
-            elif event.type == EVENT_PLAY_THEME_MUSIC:
-                Game.__play_music_theme()
-            elif event.type == EVENT_PLAY_NEXT_BACKGROUND_MUSIC:
-                Game.__play_music_background()
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    self.movement[0] = True
-                if event.key == pygame.K_RIGHT:
-                    self.movement[1] = True
-            elif event.type == pygame.KEYUP:
-                if event.key == pygame.K_LEFT:
-                    self.movement[0] = False
-                if event.key == pygame.K_RIGHT:
-                    self.movement[1] = False
-                if event.key == pygame.K_RETURN and self.status.state == State.IDLE:
-                    self.status.set_state(State.START)
-                if (
-                    event.key == pygame.K_SPACE
-                    and self.status.state == State.WAITING_BALL_RELEASE
-                ):
-                    self.ball.launch()
-                    self.status.set_state(State.PLAYING)
-                if event.key == pygame.K_r:
-                    self.status.set_state(State.RESTART)
-                if event.key == pygame.K_q:
-                    Game.__quit()
+            current_time = time.perf_counter()
+            frame_time = min(current_time - previous_time, MAX_FRAME_TIME)
+            previous_time = current_time
 
-    def __handle_state(self, dt):
+            self.profiler.begin_frame()
+
+            with self.profiler.phase("events"):
+                frame_time, movement = self.__next_frame(frame_time)
+
+            accumulator += frame_time
+
+            self.music.update(frame_time)
+
+            paddle_position = self.paddle.position[0]
+            # advance the physics in fixed steps regardless of the frame rate
+            while accumulator >= physics_dt:
+                if movement and self.status.state in self.__PADDLE_STATES:
+                    with self.profiler.phase("paddle"):
+                        self.paddle.update(physics_dt, (movement, 0))
+                with self.profiler.phase("state"):
+                    self.__handle_state(physics_dt)
+                accumulator -= physics_dt
+
+            self.sounds.flush()
+
+            with self.profiler.phase("render"):
+                self.render()
+
+            if self.paddle.position[0] != paddle_position:
+                latency = self.input.pop_latency()
+                if latency is not None:
+                    self.profiler.record("input_latency", latency)
+
+            self.profiler.end_frame()
+
+            self.__startup.mark("first frame")
+            self.__startup.report()
+
+            self.__clock.tick(self.__frame_rate())
+
+    def render(self):
+        self.header.update(self.status, self.tilemap.progress)
+        self.__renderer.render()
+
+    def __frame_rate(self):
+        if self.__fps and self.status.state in self.__LOW_POWER_STATES:
+            return min(IDLE_FPS, self.__fps)
+        return self.__fps
+
+    def __next_frame(self, frame_time):
+        events = pygame.event.get()
+        for event in events:
+            if event.type in self.__event_handlers:
+                self.__event_handlers[event.type]()
+
+        actions = self.input.poll(events)
+        movement = self.input.movement
+
+        if self.__replay:
+            frame = self.__replay.next_frame()
+            if frame is None:
+                self.__quit()
+
+            # live input is ignored, the recorded input and timing drive the game
+            frame_time, movement, actions = frame
+
+        if self.__recorder:
+            self.__recorder.record_frame(frame_time, movement, actions)
+
+        for action in actions:
+            self.__action_handlers[action]()
+
+        return frame_time, movement
+
+    def __start(self):
         if self.status.state == State.IDLE:
-            self.game_surface.blit(
-                self.start_instructions_surface,
-                (
-                    self.game_surface.get_rect().centerx
-                    - self.start_instructions_surface.get_width() / 2,
-                    self.game_surface.get_height() - self.__PADDLE_OFFSET_Y * 2.5,
-                ),
+            self.status.set_state(State.START)
+
+    def __launch(self):
+        if self.status.state == State.WAITING_BALL_RELEASE:
+            self.ball.launch()
+            self.balls.spawn(
+                self.ball.position, self.__extra_balls, self.ball.acceleration
             )
+            self.status.set_state(State.PLAYING)
+
+    def __restart(self):
+        self.status.set_state(State.RESTART)
+
+    def __handle_state(self, dt):
+        if self.status.state == State.IDLE:
             self.ball.update(dt)
         elif self.status.state == State.START:
-            Game.__play_music_game_start()
-            self.tilemap.generate_random()
+            self.music.play("game_start", endevent=EVENT_PLAY_NEXT_BACKGROUND_MUSIC)
+            self.__start_level()
             self.status.set_state(State.WAITING_BALL_RELEASE)
         elif self.status.state == State.PLAYING:
             self.ball.update(dt)
+            # the main ball can lose a life or clear the level on its own
+            if self.status.state == State.PLAYING:
+                self.balls.update(dt)
         elif self.status.state == State.LIFE_LOST:
             self.ball.reset()
+            self.balls.clear()
             if self.status.lives == 0:
                 self.status.set_state(State.GAME_LOST)
             else:
-                self.sound_life_lost.play()
+                self.sounds.play("life_lost")
                 self.status.set_state(State.WAITING_BALL_RELEASE)
         elif self.status.state == State.LEVEL_CLEARED:
-            self.status.set_state(State.GAME_WON)
+            self.balls.clear()
+            if self.status.level + 1 < len(self.levels):
+                self.status.set_state(State.NEXT_LEVEL)
+            else:
+                self.status.set_state(State.GAME_WON)
         elif self.status.state == State.WAITING_BALL_RELEASE:
             self.ball.update(dt)
         elif self.status.state == State.GAME_LOST:
-            Game.__play_music_game_over()
-            self.status.set_state(State.IDLE)
+            self.music.play("game_over", endevent=EVENT_PLAY_THEME_MUSIC)
+            self.__stop_level()
         elif self.status.state == State.GAME_WON:
-            Game.__play_music_game_won()
-            self.status.set_state(State.IDLE)
+            self.music.play("game_won", endevent=EVENT_PLAY_THEME_MUSIC)
+            self.__stop_level()
         elif self.status.state == State.NEXT_LEVEL:
-            pass
+            self.ball.reset()
+            self.__start_level()
+            self.status.set_state(State.WAITING_BALL_RELEASE)
         elif self.status.state == State.RESTART:
             self.ball.reset()
-            Game.__play_music_theme()
-            self.status.set_state(State.IDLE)
-
-    def __render_surfaces(self):
-        self.header.render(self.header_surface)
-        self.tilemap.render(self.game_surface)
-        self.paddle.render(self.game_surface)
-        self.ball.render(self.game_surface)
-        self.screen.blit(self.header_surface, (0, 0))
-        self.screen.blit(self.game_surface, (0, self.HEADER_AREA_SIZE[1]))
-
-    @staticmethod
-    def __play_music_theme():
-        pygame.mixer.music.load(get_relative_path("data/audio/theme.wav"))
-        pygame.mixer.music.set_volume(VOLUME)
-        pygame.mixer.music.play(-1, 0.5)
-
-    @staticmethod
-    def __play_music_background():
-        dir_path = get_relative_path("data/audio/background")
-        audio_file_index = RANDOM_GENERATOR.randint(
-            1, len(fnmatch.filter(os.listdir(dir_path), "*.*"))
-        )
-        audio_file_path = f"{dir_path}/{audio_file_index}.wav"
-        pygame.mixer.music.load(audio_file_path)
-        pygame.mixer.music.play()
-        pygame.mixer.music.set_endevent(EVENT_PLAY_NEXT_BACKGROUND_MUSIC)
-
-    @staticmethod
-    def __play_music_game_start():
-        pygame.mixer.music.load(get_relative_path("data/audio/game_start.wav"))
-        pygame.mixer.music.set_volume(VOLUME)
-        pygame.mixer.music.play()
-        pygame.mixer.music.set_endevent(EVENT_PLAY_NEXT_BACKGROUND_MUSIC)
-
-    @staticmethod
-    def __play_music_game_over():
-        pygame.mixer.music.load(get_relative_path("data/audio/game_over.wav"))
-        pygame.mixer.music.set_volume(VOLUME)
-        pygame.mixer.music.play()
-        pygame.mixer.music.set_endevent(EVENT_PLAY_THEME_MUSIC)
-
-    @staticmethod
-    def __play_music_game_won():
-        pygame.mixer.music.load(get_relative_path("data/audio/game_won.wav"))
-        pygame.mixer.music.set_volume(VOLUME)
-        pygame.mixer.music.play()
-        pygame.mixer.music.set_endevent(EVENT_PLAY_THEME_MUSIC)
-
-    @staticmethod
-    def __quit():
+            self.balls.clear()
+            self.__play_music_theme()
+            self.__stop_level()
+
+    def __stop_level(self):
+        # back to the title map, with no level progress left in the header
+        self.tilemap.clear()
+        self.status.set_state(State.IDLE)
+
+    def __start_level(self):
+        if not len(self.levels):
+            self.tilemap.generate_random()
+            return
+
+        self.tilemap.load_level(self.levels.get(self.status.level))
+        # get the next stage ready while this one is played
+        self.levels.preload(self.status.level + 1)
+
+    def render_background(self, surface):
+        with self.profiler.phase("tilemap"):
+            self.tilemap.render(surface)
+        if self.status.state == State.IDLE:
+            surface.blit(
+                self.start_instructions_surface,
+                (
+                    surface.get_rect().centerx
+                    - self.start_instructions_surface.get_width() / 2,
+                    surface.get_height() - self.PADDLE_OFFSET_Y * 2.5,
+                ),
+            )
+
+    def sprites(self):
+        return self.paddle, self.ball, self.balls
+
+    def __play_music_theme(self):
+        self.music.play("theme", loops=-1, start=0.5)
+
+    def __resize(self):
+        self.__renderer.resize()
+
+    def __play_next_background_music(self):
+        self.music.play_background(EVENT_PLAY_NEXT_BACKGROUND_MUSIC)
+
+    def __quit(self):
+        self.profiler.dump()
         pygame.quit()
         sys.exit()
 
 
+def __window_size(value):
+    try:
+        width, height = (int(size) for size in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid window size: {value}")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="pykanoid")
+    parser.add_argument(
+        "--fps", type=int, default=FPS, help="frame rate cap, 0 for uncapped"
+    )
+    parser.add_argument(
+        "--vsync",
+        action=argparse.BooleanOptionalAction,
+        default=VSYNC,
+        help="synchronize frames with the display refresh rate",
+    )
+    parser.add_argument(
+        "--dirty-rects",
+        action=argparse.BooleanOptionalAction,
+        default=DIRTY_RECTS,
+        help="only redraw and update the regions of the screen that changed",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=("software", "gpu"),
+        default=RENDERER,
+        help="draw with surface blits or with the SDL2 GPU renderer",
+    )
+    parser.add_argument(
+        "--require-acceleration",
+        action=argparse.BooleanOptionalAction,
+        default=REQUIRE_ACCELERATION,
+        help="fall back to software rendering when the GPU renderer has no "
+        "hardware acceleration",
+    )
+    parser.add_argument(
+        "--scaling",
+        choices=SCALING_MODES,
+        default=SCALING,
+        help="render at the logical resolution and scale it to a resizable window",
+    )
+    parser.add_argument(
+        "--window-size",
+        type=__window_size,
+        default=SCALING_WINDOW_SIZE,
+        metavar="WIDTHxHEIGHT",
+        help="initial window size when scaling",
+    )
+    parser.add_argument(
+        "--profile",
+        action=argparse.BooleanOptionalAction,
+        default=PROFILE,
+        help="show frame timings and dump a trace on exit",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        default=PROFILE_TRACE_PATH,
+        help="where to dump the frame trace, as CSV or .json",
+    )
+    parser.add_argument(
+        "--profile-allocations",
+        action=argparse.BooleanOptionalAction,
+        default=PROFILE_ALLOCATIONS,
+        help="also trace the memory allocated per frame, which slows frames down",
+    )
+    parser.add_argument("--seed", type=int, help="seed for the random generator")
+    parser.add_argument("--record", help="record the input and timing to a file")
+    parser.add_argument("--replay", help="replay a recorded session")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run without a visible window or audio output",
+    )
+    parser.add_argument(
+        "--balls",
+        type=int,
+        default=EXTRA_BALLS,
+        help="extra balls launched with the ball, for stress testing",
+    )
+    parser.add_argument(
+        "--array-tilemap",
+        action=argparse.BooleanOptionalAction,
+        default=ARRAY_TILEMAP,
+        help="keep the tiles in numpy arrays instead of a dictionary",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action=argparse.BooleanOptionalAction,
+        default=STARTUP_REPORT,
+        help="print how long each startup step took once the first frame is shown",
+    )
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    Game(
+        fps=args.fps,
+        vsync=args.vsync,
+        dirty_rects=args.dirty_rects,
+        profile=args.profile,
+        profile_trace_path=args.profile_trace,
+        profile_allocations=args.profile_allocations,
+        seed=args.seed,
+        record_path=args.record,
+        replay_path=args.replay,
+        extra_balls=args.balls,
+        array_tilemap=args.array_tilemap,
+        startup_report=args.startup_report,
+        renderer=args.renderer,
+        require_acceleration=args.require_acceleration,
+        scaling=args.scaling,
+        window_size=args.window_size,
+    ).run()
+
+
 if __name__ == "__main__":
-    Game().run()
+    main()
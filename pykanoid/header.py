@@ -3,19 +3,22 @@ from pygame import Surface
 
 from pykanoid.settings import FONT_FILE_PATH
 from pykanoid.status import Status
+from pykanoid.text import TextCache
 from pykanoid.utils import load_image, get_relative_path
 
 
 class Header:
+    __PROGRESS_BAR_SIZE = (200, 12)
+
     def __init__(self, status: Status):
         self.__status = status
-        self.__life_asset = pygame.transform.scale(
-            load_image("life/heart_48.png"), (24, 24)
-        )
-        self.__font = pygame.font.Font(get_relative_path(FONT_FILE_PATH), 24)
+        self.__progress = 0
+        self.__life_asset = load_image("life/heart_48.png", size=(24, 24))
+        self.__text = TextCache(pygame.font.Font(get_relative_path(FONT_FILE_PATH), 24))
 
-    def update(self, status: Status):
+    def update(self, status: Status, progress=0):
         self.__status = status
+        self.__progress = progress
 
     def render(self, surface: Surface):
         gap = 10
@@ -23,10 +26,17 @@ class Header:
             surface.blit(
                 self.__life_asset, (gap + life * self.__life_asset.get_width(), gap)
             )
-        score_surface = self.__font.render(
+        score_surface = self.__text.render(
             str(self.__status.score), False, (255, 255, 255, 255)
         )
         surface.blit(
             score_surface,
             (surface.get_width() - score_surface.get_width() - gap, gap / 2),
         )
+
+        if self.__progress:
+            progress_rect = pygame.Rect((0, 0), self.__PROGRESS_BAR_SIZE)
+            progress_rect.center = surface.get_rect().center
+            pygame.draw.rect(surface, "White", progress_rect, 1)
+            progress_rect.width = round(progress_rect.width * self.__progress)
+            pygame.draw.rect(surface, "White", progress_rect)
@@ -0,0 +1,69 @@
+import time
+from enum import auto, StrEnum, unique
+
+import pygame
+
+from pykanoid.settings import KEY_BINDINGS
+
+
+@unique
+class Action(StrEnum):
+    LEFT = auto()
+    RIGHT = auto()
+    START = auto()
+    LAUNCH = auto()
+    RESTART = auto()
+    QUIT = auto()
+
+
+ACTIONS = tuple(Action)
+
+
+class InputHandler:
+    def __init__(self, bindings=KEY_BINDINGS, event_types=()):
+        self.movement = 0
+        self.__left_keys: list[int] = []
+        self.__right_keys: list[int] = []
+        self.__key_actions: dict[int, Action] = {}
+        self.__input_time: float | None = None
+
+        for action, key_names in bindings.items():
+            keys = [pygame.key.key_code(key_name) for key_name in key_names]
+            if action == Action.LEFT:
+                self.__left_keys += keys
+            elif action == Action.RIGHT:
+                self.__right_keys += keys
+            else:
+                self.__key_actions.update(dict.fromkeys(keys, Action(action)))
+
+        # everything else is dropped by SDL before it reaches the event queue
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, *event_types])
+
+    def poll(self, events) -> list[Action]:
+        actions = [
+            self.__key_actions[event.key]
+            for event in events
+            if event.type == pygame.KEYDOWN and event.key in self.__key_actions
+        ]
+
+        # movement is read from the keyboard state, so held keys need no events
+        pressed = pygame.key.get_pressed()
+        movement = any(pressed[key] for key in self.__right_keys) - any(
+            pressed[key] for key in self.__left_keys
+        )
+        if movement != self.movement:
+            self.movement = movement
+            self.__input_time = time.perf_counter() if movement else None
+
+        return actions
+
+    def pop_latency(self) -> float | None:
+        # time from sampling a movement change to presenting the frame it moved
+        # the paddle in, only meaningful once that frame is on screen
+        if self.__input_time is None:
+            return None
+
+        latency = time.perf_counter() - self.__input_time
+        self.__input_time = None
+        return latency
@@ -0,0 +1,125 @@
+import fnmatch
+import hashlib
+import os
+import struct
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pykanoid.tile import TileColor, TileVariant, _COLORS
+from pykanoid.utils import get_cache_path, get_relative_path
+
+LEVELS_DIR = "data/levels"
+LEVEL_FILE_PATTERN = "level_*.tmx"
+
+MAGIC = b"PKLV"
+VERSION = 1
+HEADER = struct.Struct("<4sBBB")
+
+_VARIANTS = tuple(TileVariant)
+
+
+class Level:
+    EMPTY = 0
+
+    def __init__(self, name: str, grid_size, cells: bytes):
+        self.name = name
+        self.grid_size = grid_size
+        # one byte per cell in row-major order: 0 for an empty cell, otherwise
+        # the color index plus one, with the variant index in the high nibble
+        self.cells = cells
+
+    def tiles(self):
+        for index, cell in enumerate(self.cells):
+            if cell == self.EMPTY:
+                continue
+
+            yield (
+                (index % self.grid_size[0], index // self.grid_size[0]),
+                _COLORS[(cell & 0x0F) - 1],
+                _VARIANTS[cell >> 4],
+            )
+
+
+class LevelLoader:
+    def __init__(self, levels_dir=LEVELS_DIR):
+        self.__levels_dir = get_relative_path(levels_dir)
+        self.__level_files = sorted(
+            fnmatch.filter(os.listdir(self.__levels_dir), LEVEL_FILE_PATTERN),
+            key=lambda file_name: int("".join(filter(str.isdigit, file_name)) or 0),
+        )
+        self.__executor: ThreadPoolExecutor | None = None
+        self.__preloaded: dict[int, Future] = {}
+
+    def __len__(self):
+        return len(self.__level_files)
+
+    def get(self, index) -> Level:
+        if index in self.__preloaded:
+            return self.__preloaded.pop(index).result()
+        return self.load(index)
+
+    def preload(self, index):
+        if index >= len(self) or index in self.__preloaded:
+            return
+
+        # levels are plain data, so they can be parsed off the main thread
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=1)
+        self.__preloaded[index] = self.__executor.submit(self.load, index)
+
+    def load(self, index) -> Level:
+        tmx_path = os.path.join(self.__levels_dir, self.__level_files[index])
+        with open(tmx_path, "rb") as tmx_file:
+            digest = hashlib.sha1(tmx_file.read()).hexdigest()
+        cache_path = get_cache_path(f"level-{digest}.bin")
+
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as cache_file:
+                level = self.__read(self.__level_files[index], cache_file.read())
+            if level:
+                return level
+
+        level = self.__compile(tmx_path)
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "wb") as cache_file:
+                cache_file.write(
+                    HEADER.pack(MAGIC, VERSION, *level.grid_size) + level.cells
+                )
+        except OSError:
+            pass
+
+        return level
+
+    def __compile(self, tmx_path) -> Level:
+        # pytmx is only needed when the compiled level cache is missing
+        import pytmx
+
+        tmx_data = pytmx.TiledMap(tmx_path)
+        grid_size = (tmx_data.width, tmx_data.height)
+        cells = bytearray(grid_size[0] * grid_size[1])
+
+        for x, y, gid in tmx_data.get_layer_by_name("base").iter_data():
+            properties = tmx_data.get_tile_properties_by_gid(gid) if gid else None
+            if not properties or "color" not in properties:
+                continue
+
+            color = TileColor(properties["color"])
+            variant = TileVariant(properties.get("variant", TileVariant.NORMAL))
+            cells[y * grid_size[0] + x] = (
+                _VARIANTS.index(variant) << 4 | _COLORS.index(color) + 1
+            )
+
+        return Level(os.path.basename(tmx_path), grid_size, bytes(cells))
+
+    @staticmethod
+    def __read(name, data: bytes) -> Level | None:
+        if len(data) < HEADER.size:
+            return None
+
+        magic, version, width, height = HEADER.unpack_from(data)
+        cells = data[HEADER.size :]
+        if magic != MAGIC or version != VERSION or len(cells) != width * height:
+            return None
+
+        return Level(name, (width, height), cells)
@@ -0,0 +1,231 @@
+import csv
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import pygame
+
+from pykanoid.settings import PROFILE_ALLOCATIONS, PROFILE_TRACE_FRAMES
+from pykanoid.text import TextCache
+
+
+class FrameProfiler:
+    __OVERLAY_SIZE = (260, 170)
+    __OVERLAY_REFRESH_FRAMES = 10
+    __GRAPH_HEIGHT = 40
+    __GRAPH_MAX_FRAME_TIME = 1 / 30
+    __NULL_PHASE = nullcontext()
+
+    def __init__(
+        self,
+        enabled=False,
+        trace_path=None,
+        window=600,
+        trace_frames=PROFILE_TRACE_FRAMES,
+        allocations=PROFILE_ALLOCATIONS,
+    ):
+        self.enabled = enabled
+        self.__allocations = enabled and allocations
+        self.__trace_path = trace_path
+        self.__frame_times: deque[float] = deque(maxlen=window)
+        self.__phases: dict[str, float] = {}
+        self.__samples: dict[str, float] = {}
+        self.__frame = 0
+        self.__frame_start = 0
+        self.__traced_memory = 0
+        self.__allocated_bytes = 0
+        self.__net_bytes = 0
+        self.__gc_collections = 0
+        # only the most recent frames are kept so long sessions stay bounded
+        self.__trace: deque[dict] = deque(maxlen=trace_frames)
+        self.__text = None
+        self.__overlay = None
+
+        if enabled:
+            gc.callbacks.append(self.__count_collection)
+        if self.__allocations:
+            # tracing every allocation slows the game down noticeably, so it
+            # is only done when asked for
+            tracemalloc.start()
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+
+        self.__phases = {}
+        self.__gc_collections = 0
+        if self.__allocations:
+            tracemalloc.reset_peak()
+            self.__traced_memory = tracemalloc.get_traced_memory()[0]
+        self.__frame_start = time.perf_counter()
+
+    def phase(self, name):
+        if not self.enabled:
+            return self.__NULL_PHASE
+        return self.__phase(name)
+
+    @contextmanager
+    def __phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # phases that run several times per frame, like physics steps, add up
+            self.__phases[name] = (
+                self.__phases.get(name, 0) + time.perf_counter() - start
+            )
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+
+        # unlike phases, samples stay on the overlay until they are replaced
+        self.__phases[name] = seconds
+        self.__samples[name] = seconds
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+
+        frame_time = time.perf_counter() - self.__frame_start
+        self.__frame_times.append(frame_time)
+
+        frame = {
+            "frame": self.__frame,
+            "frame_time": frame_time,
+            "gc_collections": self.__gc_collections,
+        }
+        if self.__allocations:
+            # the peak includes memory allocated and freed again within the
+            # frame, the net change only what the frame kept
+            current, peak = tracemalloc.get_traced_memory()
+            self.__allocated_bytes = peak - self.__traced_memory
+            self.__net_bytes = current - self.__traced_memory
+            frame["allocated_bytes"] = self.__allocated_bytes
+            frame["net_bytes"] = self.__net_bytes
+        self.__trace.append({**frame, **self.__phases})
+        self.__frame += 1
+
+    def percentiles(self) -> dict[str, float]:
+        if not self.__frame_times:
+            return {}
+
+        frame_times = sorted(self.__frame_times)
+        last = len(frame_times) - 1
+        return {
+            f"p{p}": frame_times[min(len(frame_times) * p // 100, last)]
+            for p in (50, 95, 99)
+        }
+
+    def render(self, surface: pygame.Surface, position) -> pygame.Rect | None:
+        if not self.enabled:
+            return None
+
+        if self.__overlay is None or self.__frame % self.__OVERLAY_REFRESH_FRAMES == 0:
+            self.__overlay = self.__render_overlay()
+        return surface.blit(self.__overlay, position)
+
+    def __count_collection(self, phase, info):
+        if phase == "start":
+            self.__gc_collections += 1
+
+    def __render_overlay(self) -> pygame.Surface:
+        if self.__text is None:
+            self.__text = TextCache(pygame.font.Font(None, 18))
+
+        overlay = pygame.Surface(self.__OVERLAY_SIZE)
+        overlay.fill("Black")
+
+        lines = [
+            "  ".join(
+                f"{name} {value * 1000:.2f}ms"
+                for name, value in self.percentiles().items()
+            ),
+            f"gc collections {self.__gc_collections}",
+        ]
+        if self.__allocations:
+            lines.append(
+                f"allocated {self.__allocated_bytes / 1024:.1f}KiB  "
+                f"net {self.__net_bytes / 1024:.1f}KiB"
+            )
+        lines += [
+            f"{name} {value * 1000:.2f}ms"
+            for name, value in {**self.__phases, **self.__samples}.items()
+        ]
+
+        y = 4
+        for line in lines:
+            text_surface = self.__text.render(line, True, "White")
+            overlay.blit(text_surface, (4, y))
+            y += text_surface.get_height()
+
+        if len(self.__frame_times) > 1:
+            graph_width = self.__OVERLAY_SIZE[0] - 8
+            frame_times = list(self.__frame_times)[-graph_width:]
+            bottom = self.__OVERLAY_SIZE[1] - 4
+            points = [
+                (
+                    4 + i,
+                    bottom
+                    - min(frame_time / self.__GRAPH_MAX_FRAME_TIME, 1)
+                    * self.__GRAPH_HEIGHT,
+                )
+                for i, frame_time in enumerate(frame_times)
+            ]
+            pygame.draw.lines(overlay, "Green", False, points)
+
+        return overlay
+
+    def dump(self):
+        if not self.enabled or not self.__trace_path or not self.__trace:
+            return
+
+        if self.__trace_path.endswith(".json"):
+            with open(self.__trace_path, "w") as trace_file:
+                json.dump(
+                    {"percentiles": self.percentiles(), "frames": list(self.__trace)},
+                    trace_file,
+                )
+            return
+
+        field_names = ["frame", "frame_time", "gc_collections"]
+        for frame in self.__trace:
+            field_names += [name for name in frame if name not in field_names]
+
+        with open(self.__trace_path, "w", newline="") as trace_file:
+            writer = csv.DictWriter(trace_file, fieldnames=field_names, restval=0)
+            writer.writeheader()
+            writer.writerows(self.__trace)
+
+
+class StartupTimer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.__start = time.perf_counter()
+        self.__last = self.__start
+        self.__marks: list[tuple[str, float]] = []
+        self.__reported = False
+
+    def mark(self, name):
+        if not self.enabled or self.__reported:
+            return
+
+        now = time.perf_counter()
+        self.__marks.append((name, now - self.__last))
+        self.__last = now
+
+    def report(self):
+        if not self.enabled or self.__reported:
+            return
+
+        self.__reported = True
+        for name, seconds in self.__marks:
+            print(f"{name:16} {seconds * 1000:10.2f}ms", file=sys.stderr)
+        print(
+            f"{'total':16} {(self.__last - self.__start) * 1000:10.2f}ms",
+            file=sys.stderr,
+        )
@@ -0,0 +1,374 @@
+import os
+from weakref import WeakKeyDictionary
+
+import pygame
+
+from pykanoid.settings import BACKGROUND_COLOR
+
+try:
+    from pygame._sdl2 import video
+except ImportError:
+    video = None
+
+OVERLAY_POSITION = (10, 50)
+SCALING_MODES = ("off", "integer", "nearest", "smooth")
+
+
+class Display:
+    def __init__(self, window: pygame.Surface):
+        self.surface = window
+
+    def resize(self):
+        pass
+
+    def update(self, rects=None):
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+
+class ScaledDisplay:
+    def __init__(self, logical_size, mode):
+        self.__mode = mode
+        # the game always renders at the logical size, whatever the window size
+        self.surface = pygame.Surface(logical_size).convert()
+        self.__window: pygame.Surface | None = None
+        self.__target: pygame.Rect | None = None
+        self.__scaled: pygame.Surface | None = None
+        self.__per_rect = False
+        self.__resized = False
+        self.resize()
+
+    def resize(self):
+        self.__window = pygame.display.get_surface()
+        window_width, window_height = self.__window.get_size()
+        logical_width, logical_height = self.surface.get_size()
+
+        factor = min(window_width / logical_width, window_height / logical_height)
+        if self.__mode == "integer":
+            # windows smaller than the logical size can only be scaled down
+            factor = int(factor) or factor
+
+        self.__target = pygame.Rect(
+            0, 0, int(logical_width * factor), int(logical_height * factor)
+        )
+        self.__target.center = self.__window.get_rect().center
+        # the scaled frame is written straight into the window, the geometry
+        # is only worked out again when the window size changes
+        self.__scaled = self.__window.subsurface(self.__target)
+        # only whole pixel factors scale a region exactly like the full frame,
+        # otherwise the rounding at the region edges doesn't line up
+        self.__per_rect = (
+            self.__mode != "smooth"
+            and self.__target.width % logical_width == 0
+            and self.__target.height % logical_height == 0
+        )
+        self.__resized = True
+
+    def update(self, rects=None):
+        if self.__resized:
+            self.__resized = False
+            self.__window.fill("Black")
+            self.__scale(self.surface, self.__scaled)
+            pygame.display.update()
+        elif rects is None or not self.__per_rect:
+            if rects == []:
+                return
+            self.__scale(self.surface, self.__scaled)
+            pygame.display.update(self.__target)
+        else:
+            pygame.display.update([self.__scale_rect(rect) for rect in rects])
+
+    def __scale_rect(self, rect: pygame.Rect) -> pygame.Rect:
+        rect = rect.clip(self.surface.get_rect())
+        logical_width, logical_height = self.surface.get_size()
+        left = rect.left * self.__target.width // logical_width
+        top = rect.top * self.__target.height // logical_height
+        right = rect.right * self.__target.width // logical_width
+        bottom = rect.bottom * self.__target.height // logical_height
+        scaled_rect = pygame.Rect(left, top, right - left, bottom - top)
+
+        if scaled_rect.width and scaled_rect.height:
+            self.__scale(
+                self.surface.subsurface(rect), self.__scaled.subsurface(scaled_rect)
+            )
+        return scaled_rect.move(self.__target.topleft)
+
+    def __scale(self, surface: pygame.Surface, target: pygame.Surface):
+        if self.__mode == "smooth":
+            pygame.transform.smoothscale(surface, target.get_size(), target)
+        else:
+            pygame.transform.scale(surface, target.get_size(), target)
+
+
+class GpuDisplay:
+    def __init__(self, renderer, surface):
+        self.__renderer = renderer
+        self.surface = surface
+
+    def resize(self):
+        pass
+
+    def update(self, rects=None):
+        # the renderer always presents the whole frame
+        self.__renderer.present()
+
+
+class SoftwareRenderer:
+    def __init__(self, game):
+        self.game = game
+
+    def resize(self):
+        self.game.display.resize()
+
+    def show(self, surface: pygame.Surface):
+        self.game.screen.blit(surface, (0, 0))
+        self.game.display.update()
+
+
+class FullFrameRenderer(SoftwareRenderer):
+    def render(self):
+        game = self.game
+        game.tilemap.pop_dirty_rects()
+
+        game.header_surface.fill(BACKGROUND_COLOR)
+        game.header.render(game.header_surface)
+
+        game.game_surface.fill(BACKGROUND_COLOR)
+        game.render_background(game.game_surface)
+        for sprite in game.sprites():
+            sprite.render(game.game_surface)
+
+        game.screen.blit(game.header_surface, (0, 0))
+        game.screen.blit(game.game_surface, (0, game.HEADER_AREA_SIZE[1]))
+        game.profiler.render(game.screen, OVERLAY_POSITION)
+
+        with game.profiler.phase("display"):
+            game.display.update()
+
+
+class DirtyRectRenderer(SoftwareRenderer):
+    def __init__(self, game):
+        super().__init__(game)
+        self.__background = pygame.Surface(game.GAME_AREA_SIZE)
+        self.__state = None
+        self.__header_content = None
+        self.__sprite_rects: list[pygame.Rect] = []
+        self.__overlay_rect: pygame.Rect | None = None
+
+    def render(self):
+        game = self.game
+        dirty_rects = []
+
+        header_content = (game.status.lives, game.status.score, game.tilemap.progress)
+        if header_content != self.__header_content:
+            self.__header_content = header_content
+            game.header_surface.fill(BACKGROUND_COLOR)
+            game.header.render(game.header_surface)
+            dirty_rects.append(game.screen.blit(game.header_surface, (0, 0)))
+
+        tile_rects = game.tilemap.pop_dirty_rects()
+        if game.status.state != self.__state:
+            # the static layer depends on the state, e.g. the idle instructions
+            self.__state = game.status.state
+            game_rects = [self.__background.get_rect()]
+            self.__render_background(game_rects[0])
+        else:
+            for rect in tile_rects:
+                self.__render_background(rect)
+            game_rects = tile_rects + self.__sprite_rects
+
+        # restore what was under the sprites before drawing them again
+        for rect in game_rects:
+            game.game_surface.blit(self.__background, rect, rect)
+
+        self.__sprite_rects = []
+        for sprite in game.sprites():
+            sprite.render(game.game_surface)
+            self.__sprite_rects.append(
+                sprite.rect().inflate(2, 2).clip(self.__background.get_rect())
+            )
+        game_rects += self.__sprite_rects
+        if self.__overlay_rect:
+            # the overlay is drawn straight on the screen, clear it every frame
+            game_rects.append(self.__overlay_rect.move(0, -game.HEADER_AREA_SIZE[1]))
+
+        for rect in game_rects:
+            dirty_rects.append(
+                game.screen.blit(
+                    game.game_surface, rect.move(0, game.HEADER_AREA_SIZE[1]), rect
+                )
+            )
+
+        self.__overlay_rect = game.profiler.render(game.screen, OVERLAY_POSITION)
+        if self.__overlay_rect:
+            dirty_rects.append(self.__overlay_rect)
+
+        with game.profiler.phase("display"):
+            game.display.update(dirty_rects)
+
+    def __render_background(self, rect):
+        self.__background.set_clip(rect)
+        self.__background.fill(BACKGROUND_COLOR)
+        self.game.render_background(self.__background)
+        self.__background.set_clip(None)
+
+
+class TextureCache:
+    def __init__(self, renderer):
+        self.__renderer = renderer
+        # textures live as long as the surfaces they were uploaded from
+        self.__textures: WeakKeyDictionary = WeakKeyDictionary()
+
+    def get(self, surface: pygame.Surface):
+        texture = self.__textures.get(surface)
+        if texture is None:
+            texture = video.Texture.from_surface(self.__renderer, surface)
+            self.__textures[surface] = texture
+        return texture
+
+    def update(self, surface: pygame.Surface, rect: pygame.Rect | None = None):
+        if surface not in self.__textures:
+            self.get(surface)
+        elif rect is None:
+            self.__textures[surface].update(surface)
+        else:
+            self.__textures[surface].update(surface.subsurface(rect), rect)
+
+
+class TextureCanvas:
+    def __init__(self, renderer, textures: TextureCache, size, offset=(0, 0)):
+        self.__renderer = renderer
+        self.__textures = textures
+        self.__rect = pygame.Rect(offset, size)
+
+    def get_size(self):
+        return self.__rect.size
+
+    def get_width(self):
+        return self.__rect.width
+
+    def get_height(self):
+        return self.__rect.height
+
+    def get_rect(self, **kwargs) -> pygame.Rect:
+        rect = pygame.Rect((0, 0), self.__rect.size)
+        for name, value in kwargs.items():
+            setattr(rect, name, value)
+        return rect
+
+    def blit(self, source: pygame.Surface, dest, area=None) -> pygame.Rect:
+        area = pygame.Rect(area) if area else source.get_rect()
+        rect = pygame.Rect(dest[0], dest[1], area.width, area.height)
+        self.__textures.get(source).draw(area, rect.move(self.__rect.topleft))
+        return rect
+
+    def blits(self, blit_sequence, doreturn=True):
+        rects = [self.blit(*blit) for blit in blit_sequence]
+        return rects if doreturn else None
+
+    def fill(self, color, rect=None) -> pygame.Rect:
+        rect = pygame.Rect(rect) if rect else self.get_rect()
+        self.__renderer.draw_color = pygame.Color(color)
+        self.__renderer.fill_rect(rect.move(self.__rect.topleft))
+        return rect
+
+
+class GpuRenderer:
+    def __init__(
+        self,
+        game,
+        size,
+        vsync=False,
+        accelerated=True,
+        scaling="off",
+        window_size=None,
+    ):
+        if video is None:
+            raise pygame.error("pygame._sdl2 is not available")
+
+        if scaling != "off":
+            # read by SDL when the textures are created
+            os.environ["SDL_RENDER_SCALE_QUALITY"] = (
+                "linear" if scaling == "smooth" else "nearest"
+            )
+
+        self.game = game
+        self.window = video.Window(
+            "Pykanoid", window_size or size, resizable=scaling != "off"
+        )
+        try:
+            self.renderer = video.Renderer(
+                self.window, accelerated=1 if accelerated else -1, vsync=vsync
+            )
+        except RuntimeError as error:
+            # pygame._sdl2 raises its own error type, not pygame.error
+            self.window.destroy()
+            raise pygame.error(str(error)) from error
+
+        if scaling != "off":
+            # SDL scales the frame to the window and letterboxes it on resize
+            self.renderer.logical_size = size
+
+        self.__textures = TextureCache(self.renderer)
+        self.display = GpuDisplay(
+            self.renderer, TextureCanvas(self.renderer, self.__textures, size)
+        )
+        self.__game_canvas = TextureCanvas(
+            self.renderer,
+            self.__textures,
+            game.GAME_AREA_SIZE,
+            (0, game.HEADER_AREA_SIZE[1]),
+        )
+        # the static layers are drawn in software and only uploaded again
+        # where they change, sprites are drawn from textures uploaded once
+        self.__background = pygame.Surface(game.GAME_AREA_SIZE)
+        self.__state = None
+        self.__header_content = None
+
+    def resize(self):
+        pass
+
+    def show(self, surface: pygame.Surface):
+        self.renderer.draw_color = pygame.Color(BACKGROUND_COLOR)
+        self.renderer.clear()
+        video.Texture.from_surface(self.renderer, surface).draw()
+        self.renderer.present()
+
+    def render(self):
+        game = self.game
+
+        header_content = (game.status.lives, game.status.score, game.tilemap.progress)
+        if header_content != self.__header_content:
+            self.__header_content = header_content
+            game.header_surface.fill(BACKGROUND_COLOR)
+            game.header.render(game.header_surface)
+            self.__textures.update(game.header_surface)
+
+        tile_rects = game.tilemap.pop_dirty_rects()
+        if game.status.state != self.__state:
+            self.__state = game.status.state
+            self.__render_background(self.__background.get_rect())
+            self.__textures.update(self.__background)
+        else:
+            for rect in tile_rects:
+                self.__render_background(rect)
+                self.__textures.update(self.__background, rect)
+
+        self.renderer.draw_color = pygame.Color(BACKGROUND_COLOR)
+        self.renderer.clear()
+        game.screen.blit(game.header_surface, (0, 0))
+        self.__game_canvas.blit(self.__background, (0, 0))
+        for sprite in game.sprites():
+            sprite.render(self.__game_canvas)
+        game.profiler.render(game.screen, OVERLAY_POSITION)
+
+        with game.profiler.phase("display"):
+            game.display.update()
+
+    def __render_background(self, rect):
+        self.__background.set_clip(rect)
+        self.__background.fill(BACKGROUND_COLOR)
+        self.game.render_background(self.__background)
+        self.__background.set_clip(None)
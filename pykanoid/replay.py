@@ -0,0 +1,87 @@
+import struct
+
+from pykanoid.input import ACTIONS, Action
+from pykanoid.settings import PHYSICS_HZ
+
+MAGIC = b"PKRP"
+VERSION = 4
+
+HEADER = struct.Struct("<4sBqH?H")
+FRAME = struct.Struct("<dbB")
+ACTION = struct.Struct("<B")
+
+
+class ReplayError(Exception):
+    def __init__(self, path: str, reason: str, *args):
+        super().__init__(args)
+        self.path = path
+        self.reason = reason
+
+    def __str__(self):
+        return f"{self.path} is not a valid replay: {self.reason}"
+
+
+class Recorder:
+    # flush about once a second so a crash loses as little as possible
+    __FLUSH_FRAMES = 60
+
+    def __init__(self, path: str, seed: int, extra_balls: int, array_tilemap: bool):
+        self.__file = open(path, "wb")
+        self.__file.write(
+            HEADER.pack(MAGIC, VERSION, seed, extra_balls, array_tilemap, PHYSICS_HZ)
+        )
+        self.__file.flush()
+        self.__frames = 0
+
+    def record_frame(self, dt: float, movement: int, actions: list[Action]):
+        data = bytearray(FRAME.pack(dt, movement, len(actions)))
+        for action in actions:
+            data += ACTION.pack(ACTIONS.index(action))
+        self.__file.write(data)
+
+        self.__frames += 1
+        if self.__frames % self.__FLUSH_FRAMES == 0:
+            self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+
+class Replay:
+    def __init__(self, path: str):
+        with open(path, "rb") as replay_file:
+            self.__data = replay_file.read()
+
+        if len(self.__data) < HEADER.size:
+            raise ReplayError(path, "file is truncated")
+
+        magic, version, *settings = HEADER.unpack_from(self.__data)
+        if magic != MAGIC:
+            raise ReplayError(path, "unknown file format")
+        if version != VERSION:
+            raise ReplayError(path, f"unsupported version {version}")
+
+        self.seed, self.extra_balls, self.array_tilemap, physics_hz = settings
+        # this changes the simulation itself, so the replay would diverge
+        if physics_hz != PHYSICS_HZ:
+            raise ReplayError(path, f"recorded with PHYSICS_HZ={physics_hz}")
+
+        self.__offset = HEADER.size
+
+    def next_frame(self):
+        # a crashed recording can end in the middle of a frame
+        if self.__offset + FRAME.size > len(self.__data):
+            return None
+
+        dt, movement, action_count = FRAME.unpack_from(self.__data, self.__offset)
+        if self.__offset + FRAME.size + action_count * ACTION.size > len(self.__data):
+            return None
+        self.__offset += FRAME.size
+
+        actions = []
+        for _ in range(action_count):
+            (action,) = ACTION.unpack_from(self.__data, self.__offset)
+            self.__offset += ACTION.size
+            actions.append(ACTIONS[action])
+
+        return dt, movement, actions
@@ -2,5 +2,32 @@ WINDOW_WIDTH = 1024
 WINDOW_HEIGHT = 768
 BACKGROUND_COLOR = "Black"
 TOTAL_LIVES = 3
+TILE_DENSITY = 0.65
+ARRAY_TILEMAP = False
 FONT_FILE_PATH = "data/font/PixelEmulator-xq08.ttf"
+TITLE_MAP_PATH = "data/levels/title_map.tmx"
 VOLUME = 0.4
+PHYSICS_HZ = 240
+MAX_FRAME_TIME = 0.25
+FPS = 60
+IDLE_FPS = 10
+VSYNC = False
+DIRTY_RECTS = False
+RENDERER = "software"
+REQUIRE_ACCELERATION = True
+SCALING = "off"
+SCALING_WINDOW_SIZE = None
+PROFILE = False
+PROFILE_TRACE_PATH = "profile_trace.csv"
+PROFILE_TRACE_FRAMES = 36_000
+PROFILE_ALLOCATIONS = False
+EXTRA_BALLS = 0
+STARTUP_REPORT = False
+KEY_BINDINGS = {
+    "left": ("left", "a"),
+    "right": ("right", "d"),
+    "start": ("return",),
+    "launch": ("space",),
+    "restart": ("r",),
+    "quit": ("q",),
+}
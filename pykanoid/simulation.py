@@ -0,0 +1,101 @@
+from pykanoid.audio import SoundBank
+from pykanoid.entities import Ball, Paddle
+from pykanoid.game import Game
+from pykanoid.settings import ARRAY_TILEMAP, TILE_DENSITY
+from pykanoid.status import Status, State
+from pykanoid.tilemap import Tilemap
+from pykanoid.utils import load_image, RANDOM_GENERATOR
+
+
+class Simulation:
+    headless = True
+
+    GAME_AREA_SIZE = Game.GAME_AREA_SIZE
+    DT = 1 / 120
+
+    def __init__(
+        self, dt=DT, seed=None, density=TILE_DENSITY, array_tilemap=ARRAY_TILEMAP
+    ):
+        if seed is not None:
+            RANDOM_GENERATOR.seed(seed)
+
+        self.dt = dt
+        self.density = density
+        self.steps = 0
+        self.status = Status()
+        self.sounds = SoundBank(enabled=False)
+        self.tilemap = Tilemap(self, array_tilemap)
+        self.__init_paddle()
+        self.__init_ball()
+
+    def __init_paddle(self):
+        asset_paddle = load_image("paddleBlu.png", convert=False)
+        self.__paddle_position = (
+            self.GAME_AREA_SIZE[0] / 2 - asset_paddle.get_width() / 2,
+            self.GAME_AREA_SIZE[1] - Game.PADDLE_OFFSET_Y,
+        )
+        self.paddle = Paddle(self, "paddle", self.__paddle_position, asset_paddle)
+
+    def __init_ball(self):
+        asset_ball = load_image("ballBlue.png", convert=False)
+        self.ball = Ball(
+            self,
+            "ball",
+            (
+                self.GAME_AREA_SIZE[0] / 2 - asset_ball.get_width() / 2,
+                self.paddle.position[1] - asset_ball.get_height(),
+            ),
+            asset_ball,
+        )
+
+    @property
+    def finished(self):
+        return self.status.state in (State.GAME_LOST, State.GAME_WON)
+
+    def reset(self):
+        # back to the state of a new simulation, without the tiles
+        self.status.set_state(State.RESTART)
+        self.status.set_state(State.IDLE)
+        self.tilemap.clear()
+        self.paddle.position = list(self.__paddle_position)
+        self.ball.reset()
+        self.steps = 0
+
+    def start(self):
+        self.status.set_state(State.START)
+
+    def launch(self):
+        self.ball.launch()
+        self.status.set_state(State.PLAYING)
+
+    def step(self, movement=0):
+        self.paddle.update(self.dt, (movement, 0))
+        self.__handle_state()
+        self.steps += 1
+
+    def play(self, controller=None, max_steps=1_000_000):
+        self.start()
+        while not self.finished and self.steps < max_steps:
+            if self.status.state == State.WAITING_BALL_RELEASE:
+                self.launch()
+            self.step(controller(self) if controller else 0)
+        return self.status
+
+    def __handle_state(self):
+        if self.status.state == State.START:
+            self.tilemap.generate_random(self.density)
+            self.status.set_state(State.WAITING_BALL_RELEASE)
+        elif self.status.state == State.LIFE_LOST:
+            self.ball.reset()
+            if self.status.lives == 0:
+                self.status.set_state(State.GAME_LOST)
+            else:
+                self.status.set_state(State.WAITING_BALL_RELEASE)
+        elif self.status.state == State.LEVEL_CLEARED:
+            self.status.set_state(State.GAME_WON)
+        elif self.status.state in (
+            State.IDLE,
+            State.PLAYING,
+            State.WAITING_BALL_RELEASE,
+        ):
+            self.ball.update(self.dt)
@@ -65,6 +65,7 @@ class Status:
         self.__score = 0
         self.__state = State.IDLE
         self.__lives = TOTAL_LIVES
+        self.__level = 0
 
     @property
     def score(self):
@@ -78,6 +79,10 @@ class Status:
     def lives(self):
         return self.__lives
 
+    @property
+    def level(self):
+        return self.__level
+
     def set_state(self, next_state: State):
         self.__state = self.__STATE_MACHINE.transition(self.__state, next_state)
 
@@ -86,6 +91,9 @@ class Status:
         elif next_state == State.START:
             self.__score = 0
             self.__lives = TOTAL_LIVES
+            self.__level = 0
+        elif next_state == State.NEXT_LEVEL:
+            self.__level += 1
 
     def update_score(self, score):
         self.__score += score
@@ -0,0 +1,24 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    def __init__(self, font: pygame.font.Font, max_size=64):
+        self.__font = font
+        self.__max_size = max_size
+        self.__surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def render(self, text, antialias, color) -> pygame.Surface:
+        key = (text, antialias, color)
+        surface = self.__surfaces.get(key)
+
+        if surface is None:
+            surface = self.__font.render(text, antialias, color)
+            self.__surfaces[key] = surface
+            if len(self.__surfaces) > self.__max_size:
+                self.__surfaces.popitem(last=False)
+        else:
+            self.__surfaces.move_to_end(key)
+
+        return surface
@@ -35,8 +35,12 @@ _STRENGTH = {
     TileColor.GREY: -1,
 }
 
+_COLORS = tuple(_STRENGTH)
+
 
 class Tile:
+    __slots__ = ("color", "position", "variant", "strength", "score")
+
     def __init__(
         self,
         color: TileColor,
@@ -49,11 +53,18 @@ class Tile:
         self.strength = _STRENGTH[color]
         self.score = _SCORES[color]
 
+    @property
+    def remaining_score(self):
+        if self.strength <= 0:
+            return 0
+        # a hit drops the tile one color, scoring each color down to the last
+        colors = _COLORS[: _COLORS.index(self.color) + 1]
+        return sum(_SCORES[color] for color in colors)
+
     def get_next_tile(self):
-        colors = list(_STRENGTH)
-        index = colors.index(self.color) - 1
+        index = _COLORS.index(self.color) - 1
 
         if index < 0:
             return None
 
-        return Tile(colors[index], self.position, self.variant)
+        return Tile(_COLORS[index], self.position, self.variant)
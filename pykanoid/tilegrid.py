@@ -0,0 +1,214 @@
+from collections.abc import MutableMapping
+
+from pykanoid.tile import Tile, TileColor, TileVariant, _COLORS, _SCORES, _STRENGTH
+from pykanoid.utils import lazy_import, RANDOM_GENERATOR
+
+np = lazy_import("numpy")
+
+_VARIANTS = tuple(TileVariant)
+
+
+class TileGrid(MutableMapping):
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.remaining_tiles = 0
+        self.remaining_strength = 0
+        self.remaining_score = 0
+
+    def clear(self):
+        self.remaining_tiles = 0
+        self.remaining_strength = 0
+        self.remaining_score = 0
+
+    def occupied(self, columns, rows):
+        # one lookup per cell, grids backed by arrays answer all at once
+        return np.fromiter(
+            (location in self for location in zip(columns.tolist(), rows.tolist())),
+            dtype=bool,
+            count=len(columns),
+        )
+
+    def hit(self, location) -> int | None:
+        # the score of the hit, unbreakable tiles are left alone
+        tile = self[location]
+        if tile.strength <= 0:
+            return None
+
+        next_tile = tile.get_next_tile()
+        if next_tile:
+            self[location] = next_tile
+        else:
+            del self[location]
+        return tile.score
+
+    def _count(self, tile: Tile, amount):
+        if tile.strength > 0:
+            self.remaining_tiles += amount
+            self.remaining_strength += tile.strength * amount
+            self.remaining_score += tile.remaining_score * amount
+
+
+class DictTileGrid(TileGrid):
+    def __init__(self, grid_size):
+        super().__init__(grid_size)
+        self.__tiles: dict[tuple[int, int], Tile] = {}
+
+    def __getitem__(self, location) -> Tile:
+        return self.__tiles[location]
+
+    def __contains__(self, location):
+        return location in self.__tiles
+
+    def __setitem__(self, location, tile: Tile):
+        if location in self.__tiles:
+            self._count(self.__tiles[location], -1)
+        self.__tiles[location] = tile
+        self._count(tile, 1)
+
+    def __delitem__(self, location):
+        self._count(self.__tiles.pop(location), -1)
+
+    def __iter__(self):
+        return iter(self.__tiles)
+
+    def __len__(self):
+        return len(self.__tiles)
+
+    def get(self, location, default=None):
+        return self.__tiles.get(location, default)
+
+    def clear(self):
+        super().clear()
+        self.__tiles.clear()
+
+    def fill_random(self, density):
+        colors = list(TileColor)
+
+        for x in range(self.grid_size[0]):
+            for y in range(self.grid_size[1]):
+                if RANDOM_GENERATOR.random() > density:
+                    continue
+
+                location = (x, y)
+                self[location] = Tile(RANDOM_GENERATOR.choice(colors), location)
+
+
+class ArrayTileGrid(TileGrid):
+    __EMPTY = -1
+
+    def __init__(self, grid_size):
+        super().__init__(grid_size)
+        self.colors = np.full(grid_size, self.__EMPTY, dtype=np.int8)
+        self.strength = np.zeros(grid_size, dtype=np.int8)
+        self.variants = np.zeros(grid_size, dtype=np.int8)
+        self.__length = 0
+        # per color index, taken when the grid is made so tweaked tables apply
+        self.__strengths = tuple(_STRENGTH[color] for color in _COLORS)
+        self.__scores = tuple(_SCORES[color] for color in _COLORS)
+        self.__remaining_scores = tuple(
+            Tile(color, None).remaining_score for color in _COLORS
+        )
+
+    def __getitem__(self, location) -> Tile:
+        if not self.__occupied(location):
+            raise KeyError(location)
+        color = self.colors[location]
+        return Tile(_COLORS[color], location, _VARIANTS[self.variants[location]])
+
+    def __contains__(self, location):
+        return self.__occupied(location)
+
+    def __setitem__(self, location, tile: Tile):
+        if self.colors[location] == self.__EMPTY:
+            self.__length += 1
+        else:
+            self.__count(self.colors.item(location), -1)
+        color = _COLORS.index(tile.color)
+        self.colors[location] = color
+        self.strength[location] = self.__strengths[color]
+        self.variants[location] = _VARIANTS.index(tile.variant)
+        self.__count(color, 1)
+
+    def __delitem__(self, location):
+        if not self.__occupied(location):
+            raise KeyError(location)
+        self.__count(self.colors.item(location), -1)
+        self.colors[location] = self.__EMPTY
+        self.strength[location] = 0
+        self.__length -= 1
+
+    def __iter__(self):
+        return map(tuple, np.argwhere(self.colors != self.__EMPTY).tolist())
+
+    def __len__(self):
+        return self.__length
+
+    def occupied(self, columns, rows):
+        return self.colors[columns, rows] != self.__EMPTY
+
+    def get(self, location, default=None):
+        if not self.__occupied(location):
+            return default
+        return self[location]
+
+    def clear(self):
+        super().clear()
+        self.colors.fill(self.__EMPTY)
+        self.strength.fill(0)
+        self.variants.fill(0)
+        self.__length = 0
+
+    def fill_random(self, density):
+        rng = np.random.default_rng(RANDOM_GENERATOR.getrandbits(64))
+        placed = rng.random(self.grid_size) <= density
+        colors = rng.integers(0, len(_COLORS), self.grid_size, dtype=np.int8)
+
+        self.colors[placed] = colors[placed]
+        self.variants[placed] = _VARIANTS.index(TileVariant.NORMAL)
+        self.strength[:] = np.where(
+            self.colors == self.__EMPTY,
+            0,
+            np.array(self.__strengths, dtype=np.int8)[self.colors],
+        )
+        self.__length = int(np.count_nonzero(self.colors != self.__EMPTY))
+
+        breakable = self.strength > 0
+        self.remaining_tiles = int(np.count_nonzero(breakable))
+        self.remaining_strength = int(self.strength[breakable].sum())
+        self.remaining_score = int(
+            np.array(self.__remaining_scores, dtype=np.int64)[
+                self.colors[breakable]
+            ].sum()
+        )
+
+    def hit(self, location) -> int | None:
+        # tiles only ever lose strength, so a hit is an in-place decrement read
+        # and written straight from the arrays, without making any tile
+        color = self.colors.item(location)
+        if self.__strengths[color] <= 0:
+            return None
+
+        self.__count(color, -1)
+        if color == 0:
+            self.colors[location] = self.__EMPTY
+            self.strength[location] = 0
+            self.__length -= 1
+        else:
+            self.colors[location] = color - 1
+            self.strength[location] = self.__strengths[color - 1]
+            self.__count(color - 1, 1)
+        return self.__scores[color]
+
+    def __count(self, color, amount):
+        strength = self.__strengths[color]
+        if strength > 0:
+            self.remaining_tiles += amount
+            self.remaining_strength += strength * amount
+            self.remaining_score += self.__remaining_scores[color] * amount
+
+    def __occupied(self, location):
+        return (
+            0 <= location[0] < self.grid_size[0]
+            and 0 <= location[1] < self.grid_size[1]
+            and self.colors.item(location) != self.__EMPTY
+        )
@@ -1,118 +1,248 @@
+import hashlib
+import os
+import tempfile
+from xml.etree import ElementTree
+
 import pygame
 from pygame import Surface
-from pytmx.util_pygame import load_pygame
 
+from pykanoid.levels import Level
+from pykanoid.settings import BACKGROUND_COLOR, TILE_DENSITY, TITLE_MAP_PATH
 from pykanoid.status import State
-from pykanoid.tile import Tile, TileColor
-from pykanoid.utils import load_images, RANDOM_GENERATOR, get_relative_path
-from pykanoid.settings import *
-
-NEIGHBOR_OFFSETS = [
-    (-1, -1),
-    (-1, 0),
-    (-1, 1),
-    (0, -1),
-    (0, 0),
-    (0, 1),
-    (1, -1),
-    (1, 0),
-    (1, 1),
-]
+from pykanoid.tile import Tile, TileColor, TileVariant
+from pykanoid.tilegrid import ArrayTileGrid, DictTileGrid, TileGrid
+from pykanoid.utils import (
+    BASE_IMAGE_PATH,
+    load_image,
+    get_relative_path,
+    get_cache_path,
+    can_convert,
+)
 
 
 class Tilemap:
-    def __init__(self, game):
+    # bump whenever the way the title map is drawn changes, so stale cached
+    # renders are not reused
+    __TITLE_MAP_CACHE_VERSION = 2
+
+    def __init__(self, game, array=False):
         self.game = game
         self.tile_size = (64, 32)
-        self.grid_size = (self.game.game_surface.get_width() // self.tile_size[0], 12)
-        self.tilemap: dict[tuple[int, int], Tile] = {}
+        self.grid_size = (self.game.GAME_AREA_SIZE[0] // self.tile_size[0], 12)
+        self.tilemap: TileGrid = (
+            ArrayTileGrid(self.grid_size) if array else DictTileGrid(self.grid_size)
+        )
         self.offgrid_tiles = []
+        self.__initial_strength = 0
+        self.__tile_rects: dict[tuple[int, int], pygame.Rect] = {
+            (x, y): self.__tile_rect((x, y))
+            for x in range(self.grid_size[0])
+            for y in range(self.grid_size[1])
+        }
+        self.__dirty_rects: list[pygame.Rect] = []
+
+        # tile images and the title map are loaded the first time they are drawn
+        self.__tile_images: dict[tuple[TileColor, TileVariant], Surface] = {}
+        self.__title_surface: Surface | None = None
+        if self.game.headless:
+            return
 
-        self.__assets: dict[str, dict[TileColor, dict[str, Surface]]] = {"tiles": {}}
-        for t_color in TileColor:
-            self.__assets["tiles"][t_color] = load_images(f"tiles/{t_color}")
+        self.__layer = pygame.Surface(
+            (
+                self.grid_size[0] * self.tile_size[0],
+                self.grid_size[1] * self.tile_size[1],
+            ),
+            pygame.SRCALPHA,
+        )
 
-        title_map_data = load_pygame(get_relative_path("data/levels/title_map.tmx"))
-        self.title_map_layer = title_map_data.get_layer_by_name("base")
+    def generate_random(self, density=TILE_DENSITY):
+        self.tilemap.fill_random(density)
+        self.__initial_strength = self.tilemap.remaining_strength
+        self.__render_layer()
 
-    def generate_random(self):
-        colors = list(TileColor)
+    def clear(self):
+        self.tilemap.clear()
+        self.__initial_strength = 0
+        self.__render_layer()
 
-        for x in range(self.grid_size[0]):
-            for y in range(self.grid_size[1]):
-                if RANDOM_GENERATOR.random() > 0.65:
-                    continue
+    def load_level(self, level: Level):
+        self.tilemap.clear()
+        for location, color, variant in level.tiles():
+            # levels authored for a bigger board are cropped to the grid
+            if location in self.__tile_rects:
+                self.tilemap[location] = Tile(color, location, variant)
+        self.__initial_strength = self.tilemap.remaining_strength
+        self.__render_layer()
 
-                location = (x, y)
-                self.tilemap[location] = Tile(RANDOM_GENERATOR.choice(colors), location)
+    @property
+    def remaining_tiles(self):
+        return self.tilemap.remaining_tiles
 
-    def tiles_around(self, position):
-        tile_loc = (
-            int(position[0] // self.tile_size[0]),
-            int(position[1] // self.tile_size[1]),
-        )
-        tiles = []
-        for offset in NEIGHBOR_OFFSETS:
-            check_loc = (tile_loc[0] + offset[0], tile_loc[1] + offset[1])
-            if check_loc in self.tilemap:
-                tiles.append(self.tilemap[check_loc])
-        return tiles
+    @property
+    def remaining_strength(self):
+        return self.tilemap.remaining_strength
+
+    @property
+    def remaining_score(self):
+        return self.tilemap.remaining_score
+
+    @property
+    def progress(self):
+        if not self.__initial_strength:
+            return 0
+        return 1 - self.tilemap.remaining_strength / self.__initial_strength
 
-    def tile_list(self):
-        return list(self.tilemap.values())
+    def tile_collision(self, rect: pygame.Rect):
+        # only the grid cells overlapped by the rect can collide with it
+        for y in range(
+            max(rect.top // self.tile_size[1], 0),
+            min((rect.bottom - 1) // self.tile_size[1] + 1, self.grid_size[1]),
+        ):
+            for x in range(
+                max(rect.left // self.tile_size[0], 0),
+                min((rect.right - 1) // self.tile_size[0] + 1, self.grid_size[0]),
+            ):
+                if (x, y) in self.tilemap:
+                    return (x, y), self.__tile_rects[(x, y)]
+        return None
 
     def rects(self):
-        rects = []
-        for position in self.tilemap:
-            rects.append(
-                pygame.Rect(
-                    position[0] * self.tile_size[0],
-                    position[1] * self.tile_size[1],
-                    self.tile_size[0],
-                    self.tile_size[1],
-                )
-            )
-        return rects
+        return [self.__tile_rects[position] for position in self.tilemap]
 
-    def trigger_hit(self, tile: Tile):
-        if tile.strength > 0:
-            self.game.status.update_score(tile.score)
-            next_tile = tile.get_next_tile()
+    def pop_dirty_rects(self) -> list[pygame.Rect]:
+        dirty_rects = self.__dirty_rects
+        self.__dirty_rects = []
+        return dirty_rects
 
-            if next_tile:
-                self.tilemap[tile.position] = tile.get_next_tile()
-            else:
-                del self.tilemap[tile.position]
+    def trigger_hit(self, location):
+        score = self.tilemap.hit(location)
+        if score is None:
+            return
 
-            if self.__remaining_tiles() == 0:
-                self.game.status.set_state(State.LEVEL_CLEARED)
+        self.game.status.update_score(score)
+        self.__render_layer_tile(location)
+        if self.tilemap.remaining_tiles == 0:
+            self.game.status.set_state(State.LEVEL_CLEARED)
 
     def render(self, surface: pygame.Surface):
         if not self.tilemap:
-            for x, y, image in self.title_map_layer.tiles():
-                self.__draw_border_on_tile_surface(image)
-                surface.blit(
-                    image,
-                    (x * self.tile_size[0], y * self.tile_size[1]),
-                )
+            if self.__title_surface is None:
+                self.__title_surface = self.__load_title_map()
+            surface.blit(self.__title_surface, (0, 0))
 
         for tile in self.offgrid_tiles:
             surface.blit(
-                self.__assets["tiles"][tile.color][tile.variant + ".png"],
-                tile.position,
+                load_image(f"tiles/{tile.color}/{tile.variant}.png"), tile.position
             )
 
-        for position in self.tilemap:
-            tile = self.tilemap[position]
-            image = self.__assets["tiles"][tile.color][tile.variant + ".png"]
+        surface.blit(self.__layer, (0, 0))
+
+    def __load_title_map(self) -> Surface:
+        tmx_path = get_relative_path(TITLE_MAP_PATH)
+        cache_path = get_cache_path(
+            f"title_map-{self.__title_map_digest(tmx_path)}.png"
+        )
+
+        # the title map only changes with its inputs, so it is rendered once
+        # and reused across launches without parsing the tmx again
+        if os.path.exists(cache_path):
+            try:
+                title_surface = pygame.image.load(cache_path)
+                return title_surface.convert_alpha() if can_convert() else title_surface
+            except (OSError, pygame.error):
+                # a corrupt cache file is rendered again and replaced
+                pass
+
+        from pytmx.util_pygame import load_pygame
+
+        title_surface = pygame.Surface(self.__layer.get_size(), pygame.SRCALPHA)
+        # a broken title map leaves the title screen empty rather than failing
+        # the game, pytmx raises a plain Exception for missing tilesets so they
+        # are looked for up front
+        try:
+            if self.__missing_tilesets(tmx_path):
+                return title_surface
+            title_map_data = load_pygame(tmx_path)
+        except (OSError, pygame.error, ElementTree.ParseError, ValueError):
+            return title_surface
+
+        for x, y, image in title_map_data.get_layer_by_name("base").tiles():
             self.__draw_border_on_tile_surface(image)
-            surface.blit(
-                image,
-                (
-                    tile.position[0] * self.tile_size[0],
-                    tile.position[1] * self.tile_size[1],
-                ),
+            title_surface.blit(image, (x * self.tile_size[0], y * self.tile_size[1]))
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # written under a temporary name first so an interrupted save never
+            # leaves a truncated file behind
+            file_descriptor, temp_path = tempfile.mkstemp(
+                ".png", dir=os.path.dirname(cache_path)
             )
+            os.close(file_descriptor)
+            try:
+                pygame.image.save(title_surface, temp_path)
+                os.replace(temp_path, cache_path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        except (OSError, pygame.error):
+            pass
+
+        return title_surface
+
+    @staticmethod
+    def __missing_tilesets(tmx_path) -> bool:
+        tmx_dir = os.path.dirname(tmx_path)
+        for tileset in ElementTree.parse(tmx_path).getroot().iter("tileset"):
+            source = tileset.get("source")
+            if source and not os.path.exists(os.path.join(tmx_dir, source)):
+                return True
+        return False
+
+    def __title_map_digest(self, tmx_path) -> str:
+        # the render depends on the tmx, the tile images and the tile drawing
+        version = (self.__TITLE_MAP_CACHE_VERSION, self.tile_size, BACKGROUND_COLOR)
+        digest = hashlib.sha1(repr(version).encode())
+        with open(tmx_path, "rb") as tmx_file:
+            digest.update(tmx_file.read())
+
+        tiles_dir = get_relative_path(BASE_IMAGE_PATH + "tiles")
+        for directory, _, file_names in sorted(os.walk(tiles_dir)):
+            for file_name in sorted(file_names):
+                with open(os.path.join(directory, file_name), "rb") as image_file:
+                    digest.update(image_file.read())
+
+        return digest.hexdigest()
+
+    def __render_layer(self):
+        if self.game.headless:
+            return
+
+        self.__layer.fill((0, 0, 0, 0))
+        for tile in self.tilemap.values():
+            self.__layer.blit(
+                self.__tile_image(tile.color, tile.variant),
+                self.__tile_rects[tile.position],
+            )
+        self.__mark_dirty(self.__layer.get_rect())
+
+    def __render_layer_tile(self, location):
+        if self.game.headless:
+            return
+
+        tile_rect = self.__tile_rects[location]
+        self.__layer.fill((0, 0, 0, 0), tile_rect)
+        tile = self.tilemap.get(location)
+        if tile:
+            self.__layer.blit(self.__tile_image(tile.color, tile.variant), tile_rect)
+        self.__mark_dirty(tile_rect.copy())
+
+    def __tile_image(self, color: TileColor, variant: TileVariant) -> Surface:
+        key = (color, variant)
+        if key not in self.__tile_images:
+            image = load_image(f"tiles/{color}/{variant}.png").copy()
+            self.__draw_border_on_tile_surface(image)
+            self.__tile_images[key] = image
+        return self.__tile_images[key]
 
     def __draw_border_on_tile_surface(self, surface: Surface):
         pygame.draw.rect(
@@ -122,5 +252,13 @@ class Tilemap:
             1,
         )
 
-    def __remaining_tiles(self):
-        return [d for d in self.tilemap if self.tilemap[d].strength > 0]
+    def __mark_dirty(self, rect: pygame.Rect):
+        self.__dirty_rects.append(rect)
+
+    def __tile_rect(self, location) -> pygame.Rect:
+        return pygame.Rect(
+            location[0] * self.tile_size[0],
+            location[1] * self.tile_size[1],
+            self.tile_size[0],
+            self.tile_size[1],
+        )
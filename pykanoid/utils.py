@@ -1,10 +1,19 @@
+import importlib.util
+import json
 import os
 import random
+import sys
 import time
 
 import pygame
 
 BASE_IMAGE_PATH = "data/images/"
+ATLAS_IMAGE_PATH = "data/atlas/atlas.png"
+ATLAS_INDEX_PATH = "data/atlas/atlas.json"
+CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA", os.path.join(os.path.expanduser("~"), ".cache")),
+    "pykanoid",
+)
 RANDOM_GENERATOR = random.Random(time.time_ns())
 
 
@@ -12,13 +21,97 @@ def get_relative_path(source_path: str):
     return os.path.relpath(os.path.join(os.path.dirname(__file__), "..", source_path))
 
 
-def load_image(path):
-    image = pygame.image.load(get_relative_path(BASE_IMAGE_PATH + path)).convert_alpha()
-    return image
+def seed_random(seed: int | None = None) -> int:
+    if seed is None:
+        seed = time.time_ns()
+    RANDOM_GENERATOR.seed(seed)
+    return seed
+
+
+def get_cache_path(name: str):
+    return os.path.join(CACHE_DIR, name)
+
+
+def lazy_import(name):
+    if name in sys.modules:
+        return sys.modules[name]
+
+    # the module is only executed the first time one of its attributes is used
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+__images: dict[tuple, pygame.Surface] = {}
+__atlases: dict[bool, pygame.Surface] = {}
+__atlas_index: dict[str, list[int]] | None = None
+
+
+def scaled_image_name(path, size):
+    return f"{path}@{size[0]}x{size[1]}"
+
 
+def can_convert():
+    # without a display mode, e.g. with the GPU renderer, there is no pixel
+    # format to convert to, the images are uploaded to textures as they are
+    return pygame.display.get_surface() is not None
 
-def load_images(path):
+
+def load_image(path, convert=True, size=None):
+    convert = convert and can_convert()
+    key = (path, convert, size)
+    if key not in __images:
+        __images[key] = __load_image(path, convert, size)
+    return __images[key]
+
+
+def load_images(path, convert=True):
     images = {}
-    for image_name in os.listdir(get_relative_path(BASE_IMAGE_PATH + path)):
-        images[image_name] = load_image(path + "/" + image_name)
+    index = __load_atlas_index()
+    if index:
+        image_names = [
+            name.removeprefix(path + "/")
+            for name in index
+            if os.path.dirname(name) == path and "@" not in name
+        ]
+    else:
+        image_names = os.listdir(get_relative_path(BASE_IMAGE_PATH + path))
+    for image_name in image_names:
+        images[image_name] = load_image(path + "/" + image_name, convert)
     return images
+
+
+def __load_image(path, convert, size):
+    name = path if size is None else scaled_image_name(path, size)
+    index = __load_atlas_index()
+    if index and name in index:
+        return __load_atlas(convert).subsurface(index[name])
+
+    image = pygame.image.load(get_relative_path(BASE_IMAGE_PATH + path))
+    if convert:
+        image = image.convert_alpha()
+    if size:
+        image = pygame.transform.scale(image, size)
+    return image
+
+
+def __load_atlas_index():
+    global __atlas_index
+    if __atlas_index is None:
+        try:
+            with open(get_relative_path(ATLAS_INDEX_PATH)) as index_file:
+                __atlas_index = json.load(index_file)
+        except FileNotFoundError:
+            __atlas_index = {}
+    return __atlas_index
+
+
+def __load_atlas(convert):
+    if convert not in __atlases:
+        atlas = pygame.image.load(get_relative_path(ATLAS_IMAGE_PATH))
+        __atlases[convert] = atlas.convert_alpha() if convert else atlas
+    return __atlases[convert]
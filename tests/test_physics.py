@@ -0,0 +1,98 @@
+import os
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import numpy as np
+import pygame
+import pytest
+
+from pykanoid.entities import BallGroup
+from pykanoid.simulation import Simulation
+from pykanoid.status import State
+from pykanoid.tile import Tile, TileColor
+
+TILE_LOCATION = (5, 10)
+
+
+@pytest.fixture
+def simulation():
+    simulation = Simulation(seed=0)
+    simulation.start()
+    simulation.step()
+    simulation.launch()
+
+    # a single tile, with the ball well below it
+    simulation.tilemap.tilemap.clear()
+    simulation.tilemap.tilemap[TILE_LOCATION] = Tile(TileColor.BLUE, TILE_LOCATION)
+    return simulation
+
+
+def tile_rect(simulation):
+    tile_size = simulation.tilemap.tile_size
+    return pygame.Rect(
+        TILE_LOCATION[0] * tile_size[0],
+        TILE_LOCATION[1] * tile_size[1],
+        *tile_size,
+    )
+
+
+def test_tile_collision_finds_the_overlapped_tile(simulation):
+    rect = tile_rect(simulation)
+
+    location, collision_rect = simulation.tilemap.tile_collision(rect.inflate(-4, -4))
+    assert location == TILE_LOCATION
+    assert collision_rect == rect
+    assert simulation.tilemap.tile_collision(rect.move(0, rect.height)) is None
+
+
+def test_ball_sub_steps_instead_of_tunneling(simulation):
+    ball = simulation.ball
+    rect = tile_rect(simulation)
+    ball.position = [rect.centerx, rect.bottom + 102]
+    ball.velocity = [0, -1]
+
+    # a single update moves the ball far past the tile
+    ball.update(1)
+
+    assert simulation.tilemap.tilemap[TILE_LOCATION].color == TileColor.GREEN
+    assert simulation.status.score == Tile(TileColor.BLUE, None).score
+    assert ball.velocity[1] > 0
+    assert ball.position[1] >= rect.bottom
+
+
+def test_ball_group_sub_steps_instead_of_tunneling(simulation):
+    rect = tile_rect(simulation)
+    balls = BallGroup(simulation, "ball", simulation.ball.asset)
+    balls.spawn((rect.centerx, rect.bottom + 102), 1, simulation.ball.acceleration)
+    balls.velocities[:] = (0, -1)
+
+    balls.update(1)
+
+    assert simulation.tilemap.tilemap[TILE_LOCATION].color == TileColor.GREEN
+    assert balls.velocities[0, 1] > 0
+    assert balls.positions[0, 1] >= rect.bottom
+
+
+def test_clearing_the_last_tile_stops_the_ball(simulation):
+    simulation.tilemap.tilemap[TILE_LOCATION] = Tile(TileColor.GREEN, TILE_LOCATION)
+    ball = simulation.ball
+    rect = tile_rect(simulation)
+    ball.position = [rect.centerx, rect.bottom + 102]
+    ball.velocity = [0, -1]
+
+    ball.update(1)
+
+    assert simulation.tilemap.remaining_tiles == 0
+    assert simulation.status.state == State.LEVEL_CLEARED
+
+
+def test_ball_group_spawns_at_the_ball_speed(simulation):
+    balls = BallGroup(simulation, "ball", simulation.ball.asset)
+    balls.spawn((100, 500), 50, simulation.ball.acceleration)
+
+    speeds = np.hypot(balls.velocities[:, 0], balls.velocities[:, 1])
+    assert np.allclose(speeds, np.hypot(*simulation.ball.velocity))
+    # upwards, and never close to straight up
+    assert (balls.velocities[:, 1] < 0).all()
+    assert (np.abs(balls.velocities[:, 0]) > 0.5).all()
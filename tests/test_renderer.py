@@ -0,0 +1,31 @@
+import os
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import pygame
+import pytest
+
+from pykanoid.game import Game
+from pykanoid.renderer import GpuDisplay
+
+
+@pytest.fixture(autouse=True)
+def quit_pygame():
+    yield
+    pygame.quit()
+
+
+def test_gpu_renderer_renders_a_frame():
+    game = Game(renderer="gpu", require_acceleration=False)
+
+    assert isinstance(game.display, GpuDisplay)
+    game.render()
+
+
+def test_gpu_renderer_falls_back_without_acceleration():
+    # the dummy driver only has a software renderer
+    game = Game(renderer="gpu", require_acceleration=True)
+
+    assert isinstance(game.screen, pygame.Surface)
+    game.render()
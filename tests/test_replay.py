@@ -0,0 +1,86 @@
+import os
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import time
+
+import pygame
+import pytest
+
+from pykanoid.game import Game
+from pykanoid.replay import Replay, ReplayError
+
+FRAME_TIME = 1 / 60
+FRAMES = 600
+KEY_PRESSES = {1: pygame.K_RETURN, 10: pygame.K_SPACE}
+
+
+@pytest.fixture(autouse=True)
+def fake_clock(monkeypatch):
+    # every frame takes exactly one display refresh, however fast it really is
+    now = iter(range(1_000_000_000))
+    monkeypatch.setattr(time, "perf_counter", lambda: next(now) * FRAME_TIME)
+    yield
+    pygame.quit()
+
+
+def play(game: Game, key_presses=None):
+    frames = 0
+    end_frame = game.profiler.end_frame
+
+    def count_frame():
+        nonlocal frames
+        end_frame()
+        frames += 1
+        if key_presses is None:
+            return
+        if frames in key_presses:
+            pygame.event.post(
+                pygame.event.Event(pygame.KEYDOWN, key=key_presses[frames])
+            )
+        elif frames == FRAMES:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    game.profiler.end_frame = count_frame
+    with pytest.raises(SystemExit):
+        game.run()
+
+    return frames, (
+        game.status.state,
+        game.status.score,
+        game.status.lives,
+        game.status.level,
+        tuple(game.paddle.position),
+        tuple(game.ball.position),
+        game.tilemap.remaining_strength,
+        len(game.balls),
+    )
+
+
+@pytest.mark.parametrize("array_tilemap", [False, True], ids=["dict", "array"])
+def test_replay_reaches_the_recorded_state(tmp_path, array_tilemap):
+    path = str(tmp_path / "session.pkr")
+    recorded_frames, recorded = play(
+        Game(
+            fps=0,
+            seed=7,
+            record_path=path,
+            extra_balls=2,
+            array_tilemap=array_tilemap,
+        ),
+        KEY_PRESSES,
+    )
+    replayed_frames, replayed = play(Game(fps=0, replay_path=path))
+
+    assert replayed_frames == recorded_frames
+    assert replayed == recorded
+    assert recorded[1] > 0
+
+
+def test_replay_rejects_other_files(tmp_path):
+    path = tmp_path / "session.pkr"
+    path.write_bytes(b"not a replay")
+
+    with pytest.raises(ReplayError):
+        Replay(str(path))
@@ -0,0 +1,90 @@
+import os
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import random
+
+import pygame
+import pytest
+
+from pykanoid.renderer import ScaledDisplay
+
+LOGICAL_SIZE = (160, 120)
+
+
+@pytest.fixture(autouse=True)
+def display():
+    pygame.display.init()
+    yield
+    pygame.quit()
+
+
+def draw_noise(surface: pygame.Surface, rng: random.Random):
+    for x in range(surface.get_width()):
+        for y in range(0, surface.get_height(), 3):
+            surface.set_at((x, y), (rng.randrange(256), rng.randrange(256), 0))
+
+
+def window_pixels():
+    return pygame.image.tobytes(pygame.display.get_surface(), "RGB")
+
+
+@pytest.mark.parametrize(
+    "window_size, mode",
+    [
+        ((320, 240), "integer"),
+        ((480, 360), "nearest"),
+        ((200, 150), "nearest"),
+        ((250, 170), "nearest"),
+        ((200, 150), "smooth"),
+        ((100, 75), "nearest"),
+    ],
+)
+def test_dirty_rects_scale_like_the_full_frame(window_size, mode):
+    pygame.display.set_mode(window_size)
+    scaled_display = ScaledDisplay(LOGICAL_SIZE, mode)
+    rng = random.Random(1)
+    draw_noise(scaled_display.surface, rng)
+    scaled_display.update()
+
+    rects = []
+    for _ in range(20):
+        rect = pygame.Rect(
+            rng.randrange(LOGICAL_SIZE[0]),
+            rng.randrange(LOGICAL_SIZE[1]),
+            rng.randrange(1, 30),
+            rng.randrange(1, 30),
+        )
+        scaled_display.surface.fill((0, rng.randrange(256), 255), rect)
+        rects.append(rect)
+    scaled_display.update(rects)
+    partial = window_pixels()
+
+    scaled_display.update(None)
+    assert partial == window_pixels()
+
+
+def test_nothing_is_redrawn_without_dirty_rects():
+    pygame.display.set_mode((200, 150))
+    scaled_display = ScaledDisplay(LOGICAL_SIZE, "nearest")
+    scaled_display.update()
+    before = window_pixels()
+
+    scaled_display.surface.fill("White")
+    scaled_display.update([])
+    assert window_pixels() == before
+
+
+def test_frame_is_centered_in_the_window():
+    pygame.display.set_mode((400, 240))
+    scaled_display = ScaledDisplay(LOGICAL_SIZE, "integer")
+    scaled_display.surface.fill("White")
+    scaled_display.update()
+
+    window = pygame.display.get_surface()
+    # a 2x frame is 320 wide, leaving 40 pixel bars on both sides
+    assert window.get_at((39, 120)) == pygame.Color("Black")
+    assert window.get_at((40, 120)) == pygame.Color("White")
+    assert window.get_at((359, 120)) == pygame.Color("White")
+    assert window.get_at((360, 120)) == pygame.Color("Black")
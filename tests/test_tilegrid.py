@@ -0,0 +1,120 @@
+import os
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import numpy as np
+import pygame
+import pytest
+
+from pykanoid.levels import Level
+from pykanoid.simulation import Simulation
+from pykanoid.tile import Tile, TileColor, _COLORS
+from pykanoid.tilegrid import ArrayTileGrid, DictTileGrid
+
+GRID_SIZE = (16, 12)
+
+
+@pytest.fixture(params=[DictTileGrid, ArrayTileGrid])
+def grid(request):
+    return request.param(GRID_SIZE)
+
+
+@pytest.fixture(params=[False, True], ids=["dict", "array"])
+def simulation(request):
+    yield Simulation(seed=0, array_tilemap=request.param)
+    pygame.quit()
+
+
+def counters(grid):
+    return grid.remaining_tiles, grid.remaining_strength, grid.remaining_score
+
+
+def expected_counters(grid):
+    # recounted from the tiles themselves
+    tiles = [tile for tile in grid.values() if tile.strength > 0]
+    return (
+        len(tiles),
+        sum(tile.strength for tile in tiles),
+        sum(tile.remaining_score for tile in tiles),
+    )
+
+
+def test_hits_update_the_counters(grid):
+    grid[(0, 0)] = Tile(TileColor.BLUE, (0, 0))
+    grid[(1, 0)] = Tile(TileColor.GREY, (1, 0))
+    blue = Tile(TileColor.BLUE, None)
+    assert counters(grid) == (1, blue.strength, blue.remaining_score)
+
+    assert grid.hit((0, 0)) == blue.score
+    assert grid[(0, 0)].color == TileColor.GREEN
+    assert counters(grid) == expected_counters(grid)
+
+    assert grid.hit((0, 0)) == Tile(TileColor.GREEN, None).score
+    assert (0, 0) not in grid
+    assert counters(grid) == (0, 0, 0)
+
+    # unbreakable tiles stay where they are
+    assert grid.hit((1, 0)) is None
+    assert grid[(1, 0)].color == TileColor.GREY
+    assert len(grid) == 1
+
+
+def test_replacing_and_deleting_update_the_counters(grid):
+    grid[(2, 3)] = Tile(TileColor.RED, (2, 3))
+    grid[(2, 3)] = Tile(TileColor.YELLOW, (2, 3))
+    grid[(4, 5)] = Tile(TileColor.PURPLE, (4, 5))
+    assert counters(grid) == expected_counters(grid)
+
+    del grid[(4, 5)]
+    assert counters(grid) == expected_counters(grid)
+    with pytest.raises(KeyError):
+        del grid[(4, 5)]
+
+
+def test_refills_reset_the_counters(grid):
+    grid.fill_random(0.5)
+    assert grid.remaining_tiles > 0
+    assert counters(grid) == expected_counters(grid)
+
+    for location in list(grid):
+        grid.hit(location)
+    assert counters(grid) == expected_counters(grid)
+
+    grid.clear()
+    assert counters(grid) == (0, 0, 0)
+    assert len(grid) == 0
+
+    grid.fill_random(1.0)
+    assert len(grid) == GRID_SIZE[0] * GRID_SIZE[1]
+    assert counters(grid) == expected_counters(grid)
+
+
+def test_occupied_matches_the_tiles(grid):
+    grid.fill_random(0.5)
+    columns, rows = np.indices(GRID_SIZE).reshape(2, -1)
+
+    occupied = grid.occupied(columns, rows)
+    assert occupied.tolist() == [
+        (column, row) in grid for column, row in zip(columns, rows)
+    ]
+
+
+def test_tilemap_refills_the_grid_for_a_level(simulation):
+    tilemap = simulation.tilemap
+    tilemap.generate_random()
+    for location in list(tilemap.tilemap):
+        tilemap.trigger_hit(location)
+    assert tilemap.progress > 0
+
+    cells = bytearray(tilemap.grid_size[0] * tilemap.grid_size[1])
+    cells[0] = _COLORS.index(TileColor.RED) + 1
+    cells[1] = _COLORS.index(TileColor.GREY) + 1
+    tilemap.load_level(Level("test", tilemap.grid_size, bytes(cells)))
+
+    red = Tile(TileColor.RED, None)
+    assert len(tilemap.tilemap) == 2
+    assert tilemap.remaining_tiles == 1
+    assert tilemap.remaining_strength == red.strength
+    assert tilemap.remaining_score == red.remaining_score
+    assert tilemap.progress == 0